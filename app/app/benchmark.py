@@ -0,0 +1,286 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# Allow running as a script (python app/benchmark.py) as well as a module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import nlp_pipeline, recommender
+from app.chatbot import extract_params
+from app.nlp_pipeline import ENTITY_INTENTS, predict_entities, predict_intent
+from app.preprocessing import preprocess_text
+from app.recommender import CatalogIndex, load_catalog, recommend_rows
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), "data")
+INTENT_DATA_PATH = os.path.join(DATA_DIR, "intent_id.json")
+NER_DATA_PATH = os.path.join(DATA_DIR, "ner_id.json")
+
+BENCHMARK_VERSION = 1
+STAGES = ("preprocess_text", "predict_intent", "match_gazetteer", "predict_entities", "extract_params", "recommend", "format_results")
+SCALING_SIZES = (10_000, 100_000, 1_000_000)
+SCALING_QUERIES = 200
+PERCENTILES = (50, 95, 99)
+
+# ==========================================
+# TIMING
+# ==========================================
+class Timings:
+    """Per-group, per-stage latency samples in seconds"""
+
+    def __init__(self):
+        self.samples = defaultdict(lambda: defaultdict(list))
+
+    def record(self, group, stage, elapsed):
+        self.samples[group][stage].append(elapsed)
+        self.samples["all"][stage].append(elapsed)
+
+    def time(self, group, stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.record(group, stage, time.perf_counter() - start)
+        return result
+
+    def report(self) -> dict:
+        return {
+            group: {stage: summarize(values) for stage, values in stages.items()}
+            for group, stages in sorted(self.samples.items())
+        }
+
+def summarize(samples) -> dict:
+    """p50/p95/p99/mean latency in ms and single-thread throughput per second"""
+    values = np.asarray(samples, dtype=float)
+    total = float(values.sum())
+    summary = {"n": int(values.size)}
+    for p, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        summary[f"p{p}_ms"] = round(float(value) * 1000, 4)
+    summary["mean_ms"] = round(total / values.size * 1000, 4)
+    summary["throughput_per_s"] = round(values.size / total, 1) if total > 0 else None
+    return summary
+
+# ==========================================
+# PIPELINE STAGES
+# ==========================================
+def load_utterances():
+    """(text, annotated entities or None) from both training sets"""
+    with open(INTENT_DATA_PATH, encoding="utf-8") as f:
+        utterances = [(example["text"], None) for example in json.load(f)]
+    with open(NER_DATA_PATH, encoding="utf-8") as f:
+        for example in json.load(f):
+            utterances.append((example["text"], gold_entities(example)))
+    return utterances
+
+def gold_entities(example) -> dict:
+    """Annotated spans in the {"B-LABEL": [text, ...]} shape predict_entities returns"""
+    entities = {}
+    for span in example["entities"]:
+        entities.setdefault(f"B-{span['label']}", []).append(example["text"][span["start"]:span["end"]])
+    return entities
+
+def ner_available() -> bool:
+    try:
+        nlp_pipeline.get_ner()
+    except (ImportError, OSError) as exc:
+        print(f"[WARN] NER backend '{nlp_pipeline.NER_BACKEND}' unavailable ({exc!r}); using annotated entities")
+        return False
+    return True
+
+def bench_pipeline(utterances, catalog, repeat: int, use_ner: bool, use_gazetteer: bool = True) -> dict:
+    """Run every utterance through the stages the chatbot would, grouped by predicted intent"""
+    timings = Timings()
+    index = catalog.index
+    for _ in range(repeat):
+        for text, gold in utterances:
+            start = time.perf_counter()
+            preprocess_text(text)
+            preprocessed = time.perf_counter()
+            intent = predict_intent(text)
+            group = intent
+            timings.record(group, "preprocess_text", preprocessed - start)
+            timings.record(group, "predict_intent", time.perf_counter() - preprocessed)
+            if intent not in ENTITY_INTENTS:
+                continue
+
+            match = timings.time(group, "match_gazetteer", catalog.gazetteer.match, text) if use_gazetteer else None
+            if match is not None and match.confident:
+                entities = match.entities
+            elif use_ner:
+                entities = timings.time(group, "predict_entities", predict_entities, text)
+            else:
+                entities = gold or {}
+            params = timings.time(group, "extract_params", extract_params, text, entities)
+            if intent != "ask_recommendation":
+                continue
+
+            rows = timings.time(group, "recommend", recommend_rows, index, **params, k=5, rank_by="score")
+            timings.time(group, "format_results", catalog.display.render, rows)
+    return timings.report()
+
+def gazetteer_hits(utterances, catalog) -> dict:
+    """How many entity-intent utterances the gazetteer answers without NER, per intent"""
+    hits = {}
+    for text, _ in utterances:
+        intent = predict_intent(text)
+        if intent in ENTITY_INTENTS:
+            counts = hits.setdefault(intent, {"messages": 0, "hits": 0})
+            counts["messages"] += 1
+            counts["hits"] += catalog.gazetteer.match(text).confident
+    for counts in hits.values():
+        counts["hit_rate"] = round(counts["hits"] / counts["messages"], 3)
+    return hits
+
+# ==========================================
+# CATALOG SCALING
+# ==========================================
+def synthetic_catalog(base: pd.DataFrame, rows: int, seed: int = 0) -> pd.DataFrame:
+    """`rows` laptops resampled from `base` with prices jittered by up to ±20%"""
+    rng = np.random.default_rng(seed)
+    df = base.iloc[rng.integers(0, len(base), rows)].reset_index(drop=True)
+    df["Final Price"] = (df["Final Price"] * rng.uniform(0.8, 1.2, rows)).round(2)
+    df[recommender.catalog_store.PRICE_IDR_COLUMN] = (df["Final Price"] * recommender.IDR_PER_USD).round()
+    return df
+
+def random_params(rng, brands, count: int):
+    """Recommend params drawn like chat requests: a few criteria each, some left out"""
+    choices = {
+        "usage": ["gaming", "coding", "editing"],
+        "budget": [5_000_000, 8_000_000, 10_000_000, 15_000_000, 20_000_000, 30_000_000],   # IDR
+        "brand": brands,
+        "screen_size": [13.3, 14, 15.6, 16],
+        "preference": ["big", "medium", "small"],
+        "ram": [8, 16, 32],
+        "storage": [256, 512, 1000],
+        "touchscreen": [True],
+    }
+    queries = []
+    for _ in range(count):
+        params = {}
+        for field, values in choices.items():
+            if rng.random() < 0.4:
+                value = values[rng.integers(len(values))]
+                params[field] = value.item() if hasattr(value, "item") else value
+        queries.append(params)
+    return queries
+
+def bench_scaling(base: pd.DataFrame, sizes, queries: int) -> dict:
+    rng = np.random.default_rng(1)
+    brands = sorted({str(b).lower() for b in base["Brand"].dropna().unique()})
+    params_list = random_params(rng, brands, queries)
+
+    report = {}
+    for size in sizes:
+        df = synthetic_catalog(base, size)
+        start = time.perf_counter()
+        index = CatalogIndex(df)
+        build = time.perf_counter() - start
+
+        samples = []
+        for params in params_list:
+            start = time.perf_counter()
+            recommend_rows(index, **params, k=5, rank_by="score")
+            samples.append(time.perf_counter() - start)
+        report[str(size)] = {"index_build_ms": round(build * 1000, 2), "recommend": summarize(samples)}
+        print(f"  {size:>9,} rows: index {build * 1000:8.1f} ms, recommend p95 {report[str(size)]['recommend']['p95_ms']:.3f} ms")
+        del df, index
+    return report
+
+# ==========================================
+# BASELINE COMPARISON
+# ==========================================
+def _latencies(report: dict, prefix: str = ""):
+    """Flattened {"stages.ask_price.predict_intent.p95_ms": value, ...}"""
+    for key, value in report.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _latencies(value, path + ".")
+        elif key.endswith("_ms") and key != "mean_ms" and isinstance(value, (int, float)):
+            yield path, value
+
+def compare(current: dict, baseline: dict, tolerance: float, floor_ms: float = 0.01):
+    """Latencies more than `tolerance` (0.2 = 20%) slower than the baseline, as (path, baseline, current)"""
+    old = dict(_latencies({k: baseline.get(k, {}) for k in ("stages", "scaling")}))
+    regressions = []
+    for path, value in _latencies({k: current.get(k, {}) for k in ("stages", "scaling")}):
+        before = old.get(path)
+        # Sub-10µs figures are timer noise
+        if before is not None and value > max(before, floor_ms) * (1 + tolerance):
+            regressions.append((path, before, value))
+    return regressions
+
+def environment() -> dict:
+    return {
+        "version": BENCHMARK_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "ner_backend": nlp_pipeline.NER_BACKEND,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the chatbot pipeline stages and catalog scaling")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the utterances (after one warm-up pass)")
+    parser.add_argument("--no-ner", action="store_true", help="skip IndoBERT and use the annotated entities")
+    parser.add_argument("--no-gazetteer", action="store_true", help="always run NER, without the gazetteer fast path")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(SCALING_SIZES),
+                        help="synthetic catalog sizes (none to skip scaling)")
+    parser.add_argument("--queries", type=int, default=SCALING_QUERIES)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="JSON report to compare against; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown vs the baseline (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    utterances = load_utterances()
+    base = recommender.read_csv()
+    catalog = load_catalog()
+    use_ner = not args.no_ner and ner_available()
+
+    use_gazetteer = not args.no_gazetteer
+    print(f"Pipeline: {len(utterances)} utterances x {args.repeat}, NER {'on' if use_ner else 'off'}, "
+          f"gazetteer {'on' if use_gazetteer else 'off'}")
+    bench_pipeline(utterances, catalog, 1, use_ner, use_gazetteer)
+    stages = bench_pipeline(utterances, catalog, args.repeat, use_ner, use_gazetteer)
+    for group, group_stages in stages.items():
+        for stage in STAGES:
+            if stage in group_stages:
+                s = group_stages[stage]
+                print(f"  {group:<20} {stage:<17} p50 {s['p50_ms']:8.3f}  p95 {s['p95_ms']:8.3f}  "
+                      f"p99 {s['p99_ms']:8.3f} ms  {s['throughput_per_s']:>10}/s")
+
+    gazetteer = gazetteer_hits(utterances, catalog)
+    for intent, counts in gazetteer.items():
+        print(f"  gazetteer {intent:<20} {counts['hits']}/{counts['messages']} tanpa NER ({counts['hit_rate']:.0%})")
+
+    scaling = {}
+    if args.sizes:
+        print("Catalog scaling:")
+        scaling = bench_scaling(base, args.sizes, args.queries)
+
+    report = {"meta": {**environment(), "ner": use_ner, "gazetteer": use_gazetteer, "repeat": args.repeat},
+              "stages": stages, "gazetteer": gazetteer, "scaling": scaling}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for path, before, after in regressions:
+            print(f"❌ {path}: {before:.3f} -> {after:.3f} ms (+{(after / before - 1) * 100:.0f}%)")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ no latency regressions beyond {args.tolerance:.0%} of {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import argparse
+import os
+import sys
+import time
+
+# Allow running as a script (python app/build_catalog.py) as well as a module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import partition_store
+from app.recommender import DATA_PATH, build_catalog
+
+# ==========================================
+# BUILD-CATALOG: laptops.csv -> laptops.catalog/ (or laptops.parts/)
+# ==========================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile the laptop catalog")
+    parser.add_argument("--partitioned", action="store_true",
+                        help="write a partitioned catalog for out-of-core recommend() instead")
+    parser.add_argument("--csv", nargs="+", default=[DATA_PATH], help="source CSVs (--partitioned only)")
+    parser.add_argument("--output", help="output directory (--partitioned only)")
+    parser.add_argument("--max-rows", type=int, default=partition_store.PARTITION_MAX_ROWS, help="rows per partition")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.partitioned:
+        out_dir = args.output or partition_store.partitioned_path(args.csv[0])
+        path = partition_store.build_from_csv(args.csv, out_dir, max_rows=args.max_rows)
+        manifest = partition_store.PartitionedCatalog(path).manifest
+        print(f"✅ Katalog dipartisi ke {path}: {manifest['rows']} baris, {len(manifest['partitions'])} partisi "
+              f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+    else:
+        path = build_catalog()
+        print(f"✅ Katalog dikompilasi ke {path} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import time
+from collections import Counter, deque
+
+from app import chatbot, gazetteer, nlp_pipeline, relaxation
+from app.nlp_pipeline import ENTITY_INTENTS, predict_entities_batch, predict_intents
+
+# ==========================================
+# BULK QUERY MODE
+# ==========================================
+# Runs a JSONL log of user messages through the chat pipeline (intent ->
+# entities -> extract_params -> recommend) for analytics, regression checks
+# and cache warming. The input is read in chunks: each chunk gets one
+# intent-model call and batched NER forward passes in this process, then its
+# recommendations are filtered by a pool of forked workers while the next
+# chunk is analyzed. Results are written in input order as chunks finish, so
+# memory stays bounded by the chunks in flight. Every message is handled on
+# its own, without follow-up sessions.
+
+CHUNK_SIZE = int(os.environ.get("BULK_CHUNK_SIZE", "256"))
+TOP_K = 5
+PROGRESS_EVERY = 10_000       # messages between progress lines on stderr
+
+logger = logging.getLogger(__name__)
+
+def read_messages(lines):
+    """(id, text) per JSONL line: {"text": ..., "id": ...} objects or bare strings; bad lines give text None"""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            message = json.loads(line)
+        except ValueError:
+            yield number, None
+            continue
+        if isinstance(message, str):
+            yield number, message
+        elif isinstance(message, dict) and isinstance(message.get("text"), str):
+            yield message.get("id", number), message["text"]
+        else:
+            yield number, None
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class BulkStats:
+    """Message counts and per-stage seconds of one bulk run"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.messages = 0
+        self.counts = Counter()
+        self.intents = Counter()
+        self.seconds = Counter()
+
+    def time(self, stage, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        self.seconds[stage] += time.perf_counter() - start
+        return result
+
+    def report(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "messages": self.messages,
+            "elapsed_s": round(elapsed, 3),
+            "messages_per_s": round(self.messages / elapsed, 1) if elapsed > 0 else None,
+            "stage_s": {stage: round(secs, 3) for stage, secs in self.seconds.items()},
+            "intents": dict(self.intents),
+            **self.counts,
+        }
+
+def _ner_available() -> bool:
+    try:
+        nlp_pipeline.get_ner()
+    except (ImportError, OSError) as exc:
+        logger.warning("NER backend %r unavailable (%r); entities come from the gazetteer only",
+                       nlp_pipeline.NER_BACKEND, exc)
+        return False
+    return True
+
+def _entities(texts, catalog, use_ner, stats):
+    """Entities per text: the gazetteer's when confident, the rest in batched NER passes"""
+    entities = [None] * len(texts)
+    fallback = {}
+    for i, text in enumerate(texts):
+        if gazetteer.GAZETTEER or not use_ner:
+            match = catalog.gazetteer.match(text)
+            if match.confident or not use_ner:
+                entities[i] = match.entities
+                stats.counts["gazetteer_hit" if match.confident else "gazetteer_miss"] += 1
+                continue
+            stats.counts["gazetteer_miss"] += 1
+        fallback[i] = text
+    if fallback:
+        for i, found in zip(fallback, predict_entities_batch(list(fallback.values()))):
+            entities[i] = found
+    return entities
+
+def analyze(chunk, catalog, use_ner, stats) -> list:
+    """Output records for (id, text) messages, without recommendation results yet"""
+    records = [{"id": message_id, "text": text} for message_id, text in chunk if text is not None]
+    stats.counts["skipped"] += len(chunk) - len(records)
+    texts = [record["text"] for record in records]
+    intents = stats.time("intent", predict_intents, texts)
+
+    wanted = [i for i, intent in enumerate(intents) if intent in ENTITY_INTENTS]
+    found = stats.time("entities", _entities, [texts[i] for i in wanted], catalog, use_ner, stats)
+    for record, intent in zip(records, intents):
+        record["intent"] = intent
+        stats.intents[intent] += 1
+    for i, entities in zip(wanted, found):
+        records[i]["entities"] = entities
+        records[i]["params"] = stats.time("params", chatbot.extract_params, texts[i], entities)
+    return records
+
+def _recommend(queries):
+    """Top rows per params dict, run in a pool worker on the catalog inherited from the parent"""
+    catalog = chatbot.get_catalog()
+    results = []
+    for params in queries:
+        try:
+            _, rows = chatbot.recommend_cache.search(catalog, params, k=TOP_K, rank_by="score")
+        except (TypeError, ValueError, re.error) as exc:   # bad params or an invalid brand pattern
+            results.append(str(exc))
+            continue
+        results.append([int(row) for row in rows])
+    return results
+
+class _Done:
+    """apply_async-like result computed inline (no pool)"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def ready(self):
+        return True
+
+    def get(self):
+        return self.value
+
+def _finish(records, results, catalog, stats, out):
+    """Attach the recommendation / lookup rows to `records` and write them"""
+    results = iter(results)
+    for record in records:
+        intent = record["intent"]
+        if intent == "ask_recommendation":
+            rows = next(results)
+            if isinstance(rows, str):
+                record["error"] = rows
+                stats.counts["errors"] += 1
+                rows = []
+            elif not rows:
+                stats.counts["no_results"] += 1
+                record["suggestions"] = [relaxation.describe(suggestion, record["params"])
+                                         for suggestion in relaxation.relax(catalog.index, record["params"])]
+        elif intent in ("ask_specs", "ask_price"):
+            brand, model = chatbot.extract_laptop_name(record["entities"])
+            pattern = chatbot.SPECS_FALLBACK_PATTERN if intent == "ask_specs" else chatbot.PRICE_FALLBACK_PATTERN
+            row = chatbot.find_laptop(record["text"], brand, model, pattern, catalog)
+            rows = [] if row is None else [int(row)]
+        else:
+            rows = None
+        if rows is not None:
+            record["rows"] = rows
+            record["results"] = [catalog.display.records[row] for row in rows]
+        out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    out.flush()
+    stats.messages += len(records)
+
+def _pool(processes):
+    if processes <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        return None
+    # Forked before the models load: workers only need the catalog, shared copy-on-write
+    return multiprocessing.get_context("fork").Pool(processes)
+
+def run(input_path, output_path="-", processes: int = None, chunk_size: int = CHUNK_SIZE, use_ner: bool = True) -> dict:
+    """Answer every message of a JSONL file into a JSONL file ("-" = stdin/stdout); returns the throughput report"""
+    processes = (os.cpu_count() or 1) if processes is None else processes
+    stats = BulkStats()
+    catalog = chatbot.get_catalog()
+    pool = _pool(processes)
+    nlp_pipeline.get_intent_model()
+    use_ner = use_ner and _ner_available()
+
+    src = sys.stdin if input_path == "-" else open(input_path, encoding="utf-8")
+    out = sys.stdout if output_path == "-" else open(output_path, "w", encoding="utf-8")
+    pending = deque()             # (records, async recommendation result), in input order
+    max_pending = max(2, 2 * processes)
+    reported = 0
+    try:
+        for chunk in _chunks(read_messages(src), chunk_size):
+            records = analyze(chunk, catalog, use_ner, stats)
+            queries = [record["params"] for record in records if record["intent"] == "ask_recommendation"]
+            task = pool.apply_async(_recommend, (queries,)) if pool else _Done(stats.time("recommend", _recommend, queries))
+            pending.append((records, task))
+            while pending and (len(pending) > max_pending or pending[0][1].ready()):
+                records, task = pending.popleft()
+                _finish(records, stats.time("recommend_wait", task.get), catalog, stats, out)
+            if stats.messages - reported >= PROGRESS_EVERY:
+                reported = stats.messages
+                report = stats.report()
+                print(f"[bulk] {report['messages']:,} pesan, {report['messages_per_s']}/s", file=sys.stderr)
+        while pending:
+            records, task = pending.popleft()
+            _finish(records, stats.time("recommend_wait", task.get), catalog, stats, out)
+    finally:
+        if pool is not None:
+            pool.terminate()
+        if src is not sys.stdin:
+            src.close()
+        if out is not sys.stdout:
+            out.close()
+    return stats.report()
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# COMPILED CATALOG FORMAT
+# ==========================================
+# A compiled catalog is a directory next to the CSV:
+#   manifest.json         format version, source CSV stamp, column layout
+#   <column>.npy          numeric columns in their cleaned dtype, memory-mapped on load
+#   <column>.codes.npy    string columns as codes into an interned table
+# String tables live in the manifest. Every worker process maps the same
+# files, so the column data is shared through the page cache.
+
+FORMAT_NAME = "laptop-catalog"
+FORMAT_VERSION = 1
+
+# pandas < 3 copies on concat unless told not to; pandas 3 is lazy (copy-on-write) and deprecates the flag
+_NO_COPY = {"copy": False} if int(pd.__version__.split(".")[0]) < 3 else {}
+
+NUMERIC_COLUMNS = ("RAM", "Storage", "Screen", "Final Price")
+PRICE_IDR_COLUMN = "Price IDR"
+
+def compiled_path(csv_path: str) -> str:
+    """Directory of the compiled catalog for `csv_path` (data/laptops.csv -> data/laptops.catalog)"""
+    return os.path.splitext(csv_path)[0] + ".catalog"
+
+def source_stamp(csv_path: str) -> dict:
+    st = os.stat(csv_path)
+    return {"path": os.path.basename(csv_path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _codes_dtype(n_values):
+    # Same width pandas picks for Categorical codes, so wrapping them does not copy
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_values < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+def build_catalog(df: pd.DataFrame, csv_path: str, out_dir: str = None, idr_per_usd: int = 16000) -> str:
+    """Compile a cleaned catalog DataFrame (from the CSV at `csv_path`) into `out_dir`"""
+    out_dir = out_dir or compiled_path(csv_path)
+    parent = os.path.dirname(os.path.abspath(out_dir))
+    tmp_dir = tempfile.mkdtemp(prefix=".catalog-", dir=parent)
+
+    if PRICE_IDR_COLUMN not in df:
+        df = df.assign(**{PRICE_IDR_COLUMN: (df["Final Price"] * idr_per_usd).round()})
+
+    columns = []
+    for name in df.columns:
+        if name in NUMERIC_COLUMNS or name == PRICE_IDR_COLUMN:
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), df[name].to_numpy())
+            columns.append({"name": name, "kind": "numeric", "file": f"{name}.npy"})
+            continue
+
+        codes, uniques = pd.factorize(df[name])
+        codes = codes.astype(_codes_dtype(len(uniques)))
+        filename = f"{name}.codes.npy"
+        np.save(os.path.join(tmp_dir, filename), codes)
+        columns.append({"name": name, "kind": "strings", "file": filename, "values": [str(v) for v in uniques]})
+
+    manifest = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "rows": len(df),
+        "idr_per_usd": idr_per_usd,
+        "source": {**source_stamp(csv_path), "sha256": _sha256(csv_path)},
+        "columns": columns,
+    }
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+    replace_dir(tmp_dir, out_dir)
+    return out_dir
+
+def replace_dir(tmp_dir: str, out_dir: str):
+    """Swap a freshly built directory in; readers either see the old directory or the new one"""
+    if os.path.exists(out_dir):
+        parent = os.path.dirname(os.path.abspath(out_dir))
+        old_dir = tempfile.mkdtemp(prefix=".catalog-old-", dir=parent)
+        os.rmdir(old_dir)
+        os.replace(out_dir, old_dir)
+        os.replace(tmp_dir, out_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    else:
+        os.replace(tmp_dir, out_dir)
+
+def read_manifest(catalog_dir: str):
+    """The manifest of a compiled catalog, or None if missing or of another format version"""
+    try:
+        with open(os.path.join(catalog_dir, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != FORMAT_NAME or manifest.get("version") != FORMAT_VERSION:
+        return None
+    return manifest
+
+def is_fresh(catalog_dir: str, csv_path: str) -> bool:
+    """True when the compiled catalog was built from the current CSV"""
+    manifest = read_manifest(catalog_dir)
+    if manifest is None:
+        return False
+    try:
+        stamp = source_stamp(csv_path)
+    except OSError:
+        return True   # shipped without the CSV
+    source = manifest["source"]
+    if source["size"] != stamp["size"]:
+        return False
+    return source["mtime_ns"] == stamp["mtime_ns"] or source["sha256"] == _sha256(csv_path)
+
+def open_catalog(catalog_dir: str) -> pd.DataFrame:
+    """Zero-copy DataFrame over the memory-mapped columns of a compiled catalog"""
+    manifest = read_manifest(catalog_dir)
+    if manifest is None:
+        raise ValueError(f"{catalog_dir} is not a version {FORMAT_VERSION} compiled catalog")
+
+    series = []
+    for column in manifest["columns"]:
+        values = np.load(os.path.join(catalog_dir, column["file"]), mmap_mode="r")
+        if column["kind"] == "strings":
+            values = pd.Categorical.from_codes(values, categories=column["values"])
+        series.append(pd.Series(values, name=column["name"], copy=False))
+    return pd.concat(series, axis=1, **_NO_COPY)
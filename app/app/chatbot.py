@@ -1,55 +1,104 @@
-from app.recommender import load_data, recommend
-from app.nlp_pipeline import predict_intent, predict_entities
+from app.recommender import RecommendCache, load_catalog, merge_params, read_query_log, search_rows
+from app.session import SessionState
+from app.cache import LRUCache
+from app.preprocessing import preprocess_text
+from app.render import FORMATS, Reply, format_idr
+from app.nlp_pipeline import ENTITY_INTENTS, predict_intent, predict_entities
+from app import gazetteer, nlp_pipeline, relaxation, tracing
+from app.tracing import span
+import json
+import logging
+import os
 import re
-import string
 import sys
-from typing import Optional, Dict, Any
+import threading
+import time
+from typing import Optional
 import pandas as pd
 
+logger = logging.getLogger(__name__)
+
 # ==========================================
 # CONVERSATION MEMORY
 # ==========================================
-conversation_memory: Dict[str, Any] = {
-    "last_query": None,
-    "last_results": None,
-    "last_params": None
-}
+# Default memory for the single-user CLI; servers pass one SessionState per session
+conversation_memory = SessionState()
 
 # ==========================================
-# PREPROCESSING FUNCTION
+# CATALOG (loaded on first use)
 # ==========================================
-def preprocess_text(text):
-    text = text.lower() # Lowercasing
+_catalog = None
+_catalog_lock = threading.Lock()
 
-    # Remove URLs
-    text = re.sub(r'http\S+|www.\S+', '', text)
+def get_catalog():
+    """Catalog with its filter and lookup indexes, loaded on first use"""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                start = time.perf_counter()
+                catalog = load_catalog()
+                nlp_pipeline.load_times["catalog"] = time.perf_counter() - start
+                _catalog = catalog
+    return _catalog
 
-    # Remove emojis (basic pattern)
-    emoji_pattern = re.compile("["
-                           "\U0001F600-\U0001F64F"  # emoticons
-                           "\U0001F300-\U0001F5FF"  # symbols & pictographs
-                           "\U0001F680-\U0001F6FF"  # transport & map symbols
-                           "\U0001F1E0-\U0001F1FF"  # flags (iOS)
-                           "\U00002702-\U000027B0"
-                           "\U000024C2-\U0001F251"
-                           "]+", flags=re.UNICODE)
-    text = emoji_pattern.sub(r'', text)
+def reload_catalog() -> bool:
+    """Swap in the catalog as laptops.csv now has it; True if it changed.
 
-    # Remove special characters (punctuation and other non-alphanumeric except space)
-    text = text.translate(str.maketrans('', '', string.punctuation))
-    text = re.sub(r'[^a-zA-Z0-9\s]', '', text) # Remove any remaining non-alphanumeric chars not covered by string.punctuation
+    Price/status-only edits patch the current catalog's indexes, anything
+    else rebuilds them. Requests already holding the old Catalog finish on it.
+    """
+    global _catalog
+    with _catalog_lock:
+        current = _catalog
+        if current is None:
+            return False   # not loaded yet; the first get_catalog() reads the latest
+        start = time.perf_counter()
+        catalog = current.reload()
+        if catalog is current:
+            return False
+        _catalog = catalog
+    patched = catalog.lookup is current.lookup
+    if not patched:
+        entity_cache.clear()   # brand/model vocabulary may have changed
+    tracing.count("catalog_patched" if patched else "catalog_rebuilt")
+    logger.info("catalog %s -> %s %s in %.0f ms", current.version, catalog.version,
+                "patched" if patched else "rebuilt", (time.perf_counter() - start) * 1000)
+    prewarm_recommend_cache(catalog)
+    return True
 
-    # Remove extra whitespaces
-    text = re.sub(r'\s+', ' ', text).strip()
+def warmup(background: bool = False):
+    """Load the catalog and both models now (and prewarm the recommend cache); with background=True do it on a daemon thread"""
+    def _load():
+        nlp_pipeline.get_intent_model()
+        prewarm_recommend_cache(get_catalog())
+        nlp_pipeline.get_ner()
 
-    return text
+    if not background:
+        _load()
+        return None
+    thread = threading.Thread(target=_load, name="chatbot-warmup", daemon=True)
+    thread.start()
+    return thread
 
-def format_idr(usd_price):
-    """Format harga USD ke Rupiah"""
-    idr_price = usd_price * 16000
-    return f"Rp {idr_price:,.0f}".replace(",", ".")
+SPECS_FALLBACK_PATTERN = re.compile(r'(?:spesifikasi|spek)\s+([\w\s]+)|([\w\s]+?)\s+(?:gimana|speknya|itu)', re.IGNORECASE)
+PRICE_FALLBACK_PATTERN = re.compile(r'(?:harga)\s+([\w\s]+)|([\w\s]+?)\s+(?:berapa|harganya)', re.IGNORECASE)
 
-df = load_data()
+def find_laptop(user_text: str, brand: Optional[str], model: Optional[str], fallback_pattern, catalog=None) -> Optional[int]:
+    """Row id of the best catalog match for the NER brand/model, falling back to a regex search term"""
+    catalog = catalog or get_catalog()
+    with span("lookup"):
+        if brand or model:
+            row_id = catalog.lookup.best_match(brand=brand, model=model)
+        else:
+            row_id = None
+            match = fallback_pattern.search(user_text)
+            if match:
+                search_term = match.group(1) if match.group(1) else match.group(2)
+                if search_term and len(search_term.strip()) > 2:
+                    row_id = catalog.lookup.best_match(text=search_term.strip())
+
+    return row_id
 
 def extract_laptop_name(entities: dict) -> tuple[Optional[str], Optional[str]]:
     """Extract laptop brand and model from NER entities, returns (brand, model)"""
@@ -65,11 +114,20 @@ def extract_laptop_name(entities: dict) -> tuple[Optional[str], Optional[str]]:
     model_tokens = [t for t in model_tokens if t not in ['[CLS]', '[SEP]', '[PAD]', '[UNK]']]
     model = "".join(model_tokens).replace("##", "") if model_tokens else None
     
-    print(f"[DEBUG] Brand tokens: {brand_tokens} → '{brand}'")
-    print(f"[DEBUG] Model tokens: {model_tokens} → '{model}'")
+    logger.debug("Brand tokens: %s → %r", brand_tokens, brand)
+    logger.debug("Model tokens: %s → %r", model_tokens, model)
     
     return brand, model
 
+def budget_amount(number: str, in_millions: bool = False):
+    """Value of a budget number: "7.5" and "7,5" are decimals, "7.500.000" is grouped by thousands"""
+    parts = re.split(r'[.,]', number)
+    if len(parts) > 1 and not in_millions and all(len(part) == 3 for part in parts[1:]):
+        return int("".join(parts))
+    if len(parts) == 2:
+        return float(f"{parts[0]}.{parts[1]}")
+    return int(parts[0])
+
 def extract_params(text: str, entities: dict):
     """Extract recommendation parameters from text and entities"""
     params = {}
@@ -100,13 +158,14 @@ def extract_params(text: str, entities: dict):
         budget_tokens = entities.get("B-BUDGET", []) + entities.get("I-BUDGET", [])
         budget_text = "".join(budget_tokens).replace("##", "")
         # Extract numbers
-        numbers = re.findall(r'\d+', budget_text)
+        numbers = re.findall(r'\d+(?:[.,]\d+)*', budget_text)
         if numbers:
-            budget_val = int(numbers[0])
             # If text contains "juta" or "jt", multiply by 1000000
-            if "juta" in text.lower() or "jt" in text.lower():
+            in_millions = "juta" in text.lower() or "jt" in text.lower()
+            budget_val = budget_amount(numbers[0], in_millions)
+            if in_millions:
                 budget_val *= 1000000
-            params["budget"] = budget_val
+            params["budget"] = int(round(budget_val))
     
     # Extract SCREEN_SIZE
     if "B-SCREEN_SIZE" in entities or "I-SCREEN_SIZE" in entities:
@@ -148,9 +207,247 @@ def extract_params(text: str, entities: dict):
     
     return params
 
-def chatbot_reply(user_text: str):
-    intent = predict_intent(user_text)
-    print(f"[DEBUG] Intent: {intent}")
+# ==========================================
+# ANALYSIS CACHE
+# ==========================================
+# Intents are cached by preprocess_text() output, which is all the intent
+# model sees. Entities and params are cached by the lowercased,
+# whitespace-collapsed message instead: the NER model is uncased but does see
+# punctuation ("14.5 inch" and "145 inch" normalize to the same text).
+ANALYSIS_CACHE_SIZE = 4096
+ANALYSIS_CACHE_TTL = 3600            # seconds
+MODEL_CHECK_INTERVAL = 1.0           # seconds between model file checks
+
+intent_cache = LRUCache(maxsize=ANALYSIS_CACHE_SIZE, ttl=ANALYSIS_CACHE_TTL)
+entity_cache = LRUCache(maxsize=ANALYSIS_CACHE_SIZE, ttl=ANALYSIS_CACHE_TTL)
+_model_state = {"fingerprint": None, "checked_at": 0.0}
+
+class Analysis:
+    """Intent, NER entities and recommendation params of one message"""
+    __slots__ = ("intent", "entities", "params")
+
+    def __init__(self, intent, entities, params):
+        self.intent = intent
+        self.entities = entities
+        self.params = params
+
+def _invalidate_on_model_change():
+    now = time.monotonic()
+    if now - _model_state["checked_at"] < MODEL_CHECK_INTERVAL:
+        return
+    _model_state["checked_at"] = now
+    fingerprint = nlp_pipeline.model_fingerprint()
+    if fingerprint != _model_state["fingerprint"]:
+        if _model_state["fingerprint"] is not None:
+            # A newly published intent model is swapped in without a restart
+            nlp_pipeline.reload_intent_model()
+            intent_cache.clear()
+            entity_cache.clear()
+        _model_state["fingerprint"] = fingerprint
+
+# Cached intents / entities came from the old model
+nlp_pipeline.on_intent_model_swap(lambda version: intent_cache.clear())
+nlp_pipeline.on_ner_model_swap(entity_cache.clear)
+
+def analyze_message(user_text: str, with_entities: bool = False) -> Analysis:
+    """Intent, entities and params for a message, memoized across calls.
+
+    Entities/params are only computed for intents that use them, or for any
+    intent when `with_entities` is set.
+    """
+    _invalidate_on_model_change()
+
+    with span("normalize"):
+        intent_key = preprocess_text(user_text)
+    intent = intent_cache.get(intent_key)
+    if intent is None:
+        with span("intent"):
+            intent = predict_intent(user_text)
+        intent_cache.put(intent_key, intent)
+    tracing.set_intent(intent)
+
+    if intent not in ENTITY_INTENTS and not with_entities:
+        return Analysis(intent, {}, {})
+
+    entity_key = " ".join(user_text.lower().split())
+    cached = entity_cache.get(entity_key)
+    if cached is None:
+        entities = None
+        if gazetteer.GAZETTEER:
+            # Catalog names and spec patterns; IndoBERT only runs when they leave too much unexplained
+            with span("gazetteer"):
+                match = get_catalog().gazetteer.match(user_text)
+            tracing.count("gazetteer_hit" if match.confident else "gazetteer_miss")
+            if match.confident:
+                entities = match.entities
+        if entities is None:
+            with span("ner"):
+                entities = predict_entities(user_text)
+        with span("params"):
+            params = extract_params(user_text, entities)
+        cached = (entities, params)
+        entity_cache.put(entity_key, cached)
+    entities, params = cached
+    return Analysis(intent, entities, dict(params))
+
+def analysis_cache_stats() -> dict:
+    return {"intent": intent_cache.stats(), "entities": entity_cache.stats(), "recommend": recommend_cache.stats()}
+
+# ==========================================
+# RECOMMEND CACHE
+# ==========================================
+# Fresh (non-refinement) recommendations go through recommend_cache. With
+# RECOMMEND_QUERY_LOG set every such request's params are appended to that
+# JSONL file, and its most frequent entries are precomputed at warmup and
+# after each catalog reload.
+QUERY_LOG_PATH = os.environ.get("RECOMMEND_QUERY_LOG")
+
+recommend_cache = RecommendCache()
+_query_log_lock = threading.Lock()
+
+def log_query(params: dict):
+    if not QUERY_LOG_PATH:
+        return
+    line = json.dumps({name: value for name, value in params.items() if value is not None}, sort_keys=True)
+    try:
+        with _query_log_lock, open(QUERY_LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError:
+        logger.warning("cannot append to query log %s", QUERY_LOG_PATH, exc_info=True)
+
+def prewarm_recommend_cache(catalog) -> int:
+    """Precompute the logged popular queries for `catalog`; returns how many were cached"""
+    if not QUERY_LOG_PATH or not os.path.exists(QUERY_LOG_PATH):
+        return 0
+    start = time.perf_counter()
+    warmed = recommend_cache.prewarm(catalog, read_query_log(QUERY_LOG_PATH), k=5, rank_by="score")
+    logger.info("recommend cache: %d queries prewarmed in %.0f ms", warmed, (time.perf_counter() - start) * 1000)
+    return warmed
+
+# ==========================================
+# FOLLOW-UP REFINEMENT
+# ==========================================
+# "yang 16GB aja", "kalau yang touchscreen?" add to the previous criteria
+REFINEMENT_PATTERN = re.compile(r'^\s*(?:yang|yg|kalau|kalo|tapi|terus|trus|plus|sama|tambah)\b|\b(?:aja|saja)\b', re.IGNORECASE)
+REFINEMENT_INTENTS = {"ask_recommendation", "clarify_requirement"}
+
+def is_followup(user_text: str, memory: SessionState) -> bool:
+    return bool(memory.last_params) and bool(REFINEMENT_PATTERN.search(user_text))
+
+def recommendation_reply(user_text: str, params: dict, memory: SessionState, followup: bool = False,
+                         fmt: str = "table") -> str:
+    """Recommend for `params`; a follow-up merges them into the session's earlier criteria.
+
+    When the follow-up only adds or tightens constraints, just the earlier
+    candidates are re-filtered; relaxing one, or a catalog reload since the
+    earlier turn, triggers a full search, answered from recommend_cache when
+    the same criteria were seen before.
+    """
+    catalog = get_catalog()
+    candidates = None
+    if followup:
+        params, narrowing = merge_params(memory.last_params.to_dict(), params)
+        # Candidates from an older catalog may miss rows whose price has since dropped into range
+        if narrowing and memory.catalog_version == catalog.version:
+            candidates = memory.candidates
+        logger.debug("Merged params: %s (narrowing=%s)", params, narrowing)
+        tracing.count("refined" if narrowing else "rescanned")
+
+    with span("filter"):
+        if candidates is not None:
+            matches, rows = search_rows(catalog.index, params, k=5, rank_by="score", candidates=candidates)
+        else:
+            matches, rows = recommend_cache.search(catalog, params, k=5, rank_by="score")
+    if candidates is None:
+        log_query(params)
+
+    if not len(rows):
+        tracing.count("no_results")
+        with span("relax"):
+            suggestions = relaxation.relax(catalog.index, params)
+        if not suggestions:
+            return "Maaf, tidak ada laptop yang sesuai dengan kriteria Anda. Coba ubah kriteria pencarian."
+        tracing.count("relaxed")
+        lines = "\n".join(f"- {relaxation.describe(suggestion, params)}" for suggestion in suggestions)
+        return f"Maaf, tidak ada laptop yang sesuai dengan kriteria Anda. Ada hasil kalau kriterianya diubah:\n{lines}"
+
+    # Store in memory for follow-up questions (row ids only, not the frame)
+    memory.remember(user_text, rows, params, candidates=matches, catalog_version=catalog.version)
+
+    header = "Berikut rekomendasi laptop dengan kriteria terbaru:\n" if followup else "Berikut rekomendasi laptop:\n"
+    return listing_reply(header, rows, catalog, fmt)
+
+def listing_reply(header: str, rows, catalog, fmt: str = "table"):
+    """`header` followed by the given laptops in `fmt`"""
+    with span("format"):
+        if fmt == "json":
+            # Readable text in the reply, the structured rows alongside it
+            reply = Reply(header + catalog.display.render(rows, "text"))
+            reply.results = [catalog.display.records[row] for row in rows]
+            return reply
+        return header + catalog.display.render(rows, fmt)
+
+# ==========================================
+# SIMILAR LAPTOPS
+# ==========================================
+# "laptop yang mirip ROG Strix G15", "alternatif macbook air di bawah 15 juta".
+# The trained intent model has no such intent, so the phrasing is matched here
+# and overrides the predicted intent, but only once the laptop it names is
+# found: "kayak apa" / "seperti gimana" ask what kind of laptop, not for an
+# alternative, and keep the predicted intent.
+SIMILAR_PATTERN = re.compile(
+    r'\b(?:mirip|(?:kayak|seperti)(?!\s+(?:apa|gimana|bagaimana)\b)|alternatif|alternatifnya|pengganti|setara|sekelas)\b',
+    re.IGNORECASE)
+SIMILAR_FALLBACK_PATTERN = re.compile(
+    r'(?:mirip|kayak|seperti|alternatif|pengganti|setara|sekelas)\s+(?:(?:dengan|dari|untuk|buat|sama)\s+)?([\w\s]+)'
+    r'|([\w\s]+?)\s+(?:alternatifnya|versi lain)', re.IGNORECASE)
+SIMILAR_RESULTS = 5
+
+def similar_reference(user_text: str, analysis: Analysis, catalog) -> Optional[int]:
+    """Row id of the laptop a "mirip X" message asks alternatives to, else None"""
+    if SIMILAR_PATTERN.search(user_text) is None:
+        return None
+    with span("params"):
+        brand, model = extract_laptop_name(analysis.entities)
+    return find_laptop(user_text, brand, model, SIMILAR_FALLBACK_PATTERN, catalog)
+
+def similar_reply(analysis: Analysis, row: int, catalog, fmt: str = "table"):
+    """Laptops nearest to catalog row `row`, within the message's budget when one is given"""
+    budget = analysis.params.get("budget")
+    with span("similar"):
+        candidates = catalog.index.filter_rows(budget=budget) if budget else None
+        rows = catalog.similarity.nearest(row, SIMILAR_RESULTS, candidates)
+    record = catalog.display.records[row]
+    name = f"{record['brand']} {record['model']}"
+    if not len(rows):
+        return f"Maaf, tidak ada laptop lain yang mirip {name} dalam budget tersebut."
+    return listing_reply(f"Laptop yang mirip {name}:\n", rows, catalog, fmt)
+
+def chatbot_reply(user_text: str, memory: Optional[SessionState] = None, fmt: str = "table"):
+    """Reply to one message; its stages are traced into tracing.metrics under its intent.
+
+    `fmt` picks how recommendations are listed: "table" (the CLI default),
+    compact "text" lines, or "json", which returns a Reply whose `results`
+    holds the rows as dicts.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt must be one of {FORMATS}")
+    with tracing.message_trace():
+        return _reply(user_text, memory if memory is not None else conversation_memory, fmt)
+
+def _reply(user_text: str, memory: SessionState, fmt: str = "table"):
+    followup = is_followup(user_text, memory)
+    similar = SIMILAR_PATTERN.search(user_text) is not None
+    analysis = analyze_message(user_text, with_entities=followup or similar)
+    intent = analysis.intent
+    if similar and intent != "goodbye":
+        # One snapshot for the lookup and the reply, in case the catalog is swapped in between
+        catalog = get_catalog()
+        reference = similar_reference(user_text, analysis, catalog)
+        if reference is not None:
+            intent = "ask_similar"
+            tracing.set_intent(intent)
+    logger.debug("Intent: %s", intent)
     
     if intent == "goodbye":
         return("Terima kasih! Semoga harimu menyenangkan. 👋")
@@ -161,68 +458,38 @@ def chatbot_reply(user_text: str):
     elif intent == "fallback":
         return("Maaf, saya kurang mengerti. Bisa jelaskan lebih detail spesifikasi laptop yang dicari?")
 
+    elif intent == "ask_similar":
+        return similar_reply(analysis, reference, catalog, fmt)
+
+    elif followup and intent in REFINEMENT_INTENTS and analysis.params:
+        logger.debug("Follow-up params: %s", analysis.params)
+        return recommendation_reply(user_text, analysis.params, memory, followup=True, fmt=fmt)
+
     elif intent == "ask_recommendation":
         # Extract entities and parameters
-        entities = predict_entities(user_text)
-        print(f"[DEBUG] Entities: {entities}")
-        params = extract_params(user_text, entities)
-        print(f"[DEBUG] Extracted Params: {params}")
+        entities = analysis.entities
+        logger.debug("Entities: %s", entities)
+        params = analysis.params
+        logger.debug("Extracted params: %s", params)
         
         # Get recommendations with extracted parameters
-        results = recommend(df, **params)
-        
-        if results.empty:
-            return "Maaf, tidak ada laptop yang sesuai dengan kriteria Anda. Coba ubah kriteria pencarian."
-        
-        # Store in memory for follow-up questions
-        conversation_memory["last_query"] = user_text
-        conversation_memory["last_results"] = results.copy()
-        conversation_memory["last_params"] = params
-        
-        results = format_results(results)
-        return "Berikut rekomendasi laptop:\n" + results.to_string(index=False)
+        return recommendation_reply(user_text, params, memory, fmt=fmt)
 
     # --- PERBAIKAN LOGIKA ASK_SPECS (with NER) ---
     elif intent == "ask_specs":
         # Use NER to extract laptop brand/name
-        entities = predict_entities(user_text)
-        print(f"[DEBUG] Entities for ask_specs: {entities}")
-        brand, model = extract_laptop_name(entities)
-        print(f"[DEBUG] Extracted brand: {brand}, model: {model}")
+        entities = analysis.entities
+        logger.debug("Entities for ask_specs: %s", entities)
+        with span("params"):
+            brand, model = extract_laptop_name(entities)
+        logger.debug("Extracted brand: %s, model: %s", brand, model)
         
-        # Build search filter
-        filtered_laptop = df.copy()
+        # One snapshot for the lookup and the reply, in case the catalog is swapped in between
+        catalog = get_catalog()
+        row = find_laptop(user_text, brand, model, SPECS_FALLBACK_PATTERN, catalog)
         
-        if brand:
-            filtered_laptop = filtered_laptop[
-                filtered_laptop['Brand'].str.contains(brand, case=False, na=False)
-            ]
-        
-        if model:
-            filtered_laptop = filtered_laptop[
-                filtered_laptop['Model'].str.contains(model, case=False, na=False)
-            ]
-        
-        # Fallback to regex if NER doesn't find anything
-        if not brand and not model:
-            match = re.search(r'(?:spesifikasi|spek)\s+([\w\s]+)|([\w\s]+?)\s+(?:gimana|speknya|itu)', user_text, re.IGNORECASE)
-            if match:
-                search_term = match.group(1) if match.group(1) else match.group(2)
-                if search_term and len(search_term.strip()) > 2:
-                    filtered_laptop = df[
-                        df['Brand'].str.contains(search_term.strip(), case=False, na=False) |
-                        df['Model'].str.contains(search_term.strip(), case=False, na=False)
-                    ]
-        
-        if not filtered_laptop.empty:
-            row = filtered_laptop.iloc[0]
-            specs = f"Spesifikasi {row['Brand']} {row['Model']}:\n"
-            specs += f"   • CPU: {row['CPU']}\n"
-            specs += f"   • RAM: {row['RAM']}GB | Storage: {row['Storage']}GB\n"
-            specs += f"   • GPU: {row['GPU']}\n"
-            specs += f"   • Screen: {row['Screen']}\" | Touch: {row['Touch']}\n"
-            specs += f"   • Harga: {format_idr(row['Final Price'])}"
-            return specs
+        if row is not None:
+            return catalog.display.specs[row]
         else:
             search_desc = f"{brand} {model}".strip() if brand or model else "laptop tersebut"
             return f"Maaf, saya tidak menemukan laptop '{search_desc}'."
@@ -230,47 +497,26 @@ def chatbot_reply(user_text: str):
     # --- PERBAIKAN LOGIKA ASK_PRICE (with NER) ---
     elif intent == "ask_price":
         # Use NER to extract laptop brand/name
-        entities = predict_entities(user_text)
-        print(f"[DEBUG] Entities for ask_price: {entities}")
-        brand, model = extract_laptop_name(entities)
-        print(f"[DEBUG] Extracted brand: {brand}, model: {model}")
+        entities = analysis.entities
+        logger.debug("Entities for ask_price: %s", entities)
+        with span("params"):
+            brand, model = extract_laptop_name(entities)
+        logger.debug("Extracted brand: %s, model: %s", brand, model)
         
-        # Build search filter
-        filtered_laptop = df.copy()
-        
-        if brand:
-            filtered_laptop = filtered_laptop[
-                filtered_laptop['Brand'].str.contains(brand, case=False, na=False)
-            ]
+        # One snapshot for the lookup and the reply, in case the catalog is swapped in between
+        catalog = get_catalog()
+        row = find_laptop(user_text, brand, model, PRICE_FALLBACK_PATTERN, catalog)
         
-        if model:
-            filtered_laptop = filtered_laptop[
-                filtered_laptop['Model'].str.contains(model, case=False, na=False)
-            ]
-        
-        # Fallback to regex if NER doesn't find anything
-        if not brand and not model:
-            match = re.search(r'(?:harga)\s+([\w\s]+)|([\w\s]+?)\s+(?:berapa|harganya)', user_text, re.IGNORECASE)
-            if match:
-                search_term = match.group(1) if match.group(1) else match.group(2)
-                if search_term and len(search_term.strip()) > 2:
-                    filtered_laptop = df[
-                        df['Brand'].str.contains(search_term.strip(), case=False, na=False) |
-                        df['Model'].str.contains(search_term.strip(), case=False, na=False)
-                    ]
-        
-        if not filtered_laptop.empty:
-            row = filtered_laptop.iloc[0]
-            harga = format_idr(row['Final Price'])
-            return f"Harga {row['Brand']} {row['Model']} sekitar {harga}."
+        if row is not None:
+            return catalog.display.price_lines[row]
         else:
             search_desc = f"{brand} {model}".strip() if brand or model else "laptop tersebut"
             return f"Maaf, harga laptop '{search_desc}' tidak ditemukan."
 
     elif intent == "clarify_requirement":
         # Use conversation memory to provide context-aware clarification
-        if conversation_memory["last_params"]:
-            params = conversation_memory["last_params"]
+        if memory.last_params:
+            params = memory.last_params
             clarification = "Saya sudah punya beberapa kriteria Anda:\n"
             
             if "brand" in params:
@@ -289,13 +535,3 @@ def chatbot_reply(user_text: str):
 
     else:
         return("Maaf, saya belum paham maksud Anda.")
-
-def format_results(df):
-    df = df.copy()
-    # Convert USD → IDR for display
-    df["Final Price (IDR)"] = df["Final Price"].apply(lambda x: format_idr(x))
-
-    # Drop USD column for user-facing output
-    df = df.drop(columns=["Final Price"])
-
-    return df
\ No newline at end of file
@@ -0,0 +1,79 @@
+import argparse
+import json
+import os
+import sys
+
+# Allow running as a script (python app/export_ner.py) as well as a module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ner_backends import BACKENDS, load_backend, onnx_path
+from app.nlp_pipeline import NER_MODEL_PATH, predict_entities_batch
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(os.path.dirname(SCRIPT_DIR), "data", "ner_id.json")
+
+def export_onnx(model_path: str, opset: int = 14) -> str:
+    """Export the IndoBERT NER model to ONNX with dynamic batch/sequence axes"""
+    import torch
+    from transformers import AutoModelForTokenClassification, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=True)
+    model = AutoModelForTokenClassification.from_pretrained(model_path, local_files_only=True)
+    model.eval()
+
+    sample = tokenizer(["laptop asus buat gaming", "harga"], padding=True, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch", 1: "sequence"}
+
+    path = onnx_path(model_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+    return path
+
+def check_parity(model_path: str, backends: list, min_agreement: float) -> bool:
+    """Compare entity dicts of each backend against fp32 torch on data/ner_id.json"""
+    with open(DATA_PATH, encoding="utf-8") as f:
+        texts = [example["text"] for example in json.load(f)]
+
+    reference = predict_entities_batch(texts, ner=load_backend("torch", model_path))
+    ok = True
+    for name in backends:
+        entities = predict_entities_batch(texts, ner=load_backend(name, model_path))
+        mismatches = [i for i, (a, b) in enumerate(zip(reference, entities)) if a != b]
+        agreement = 1 - len(mismatches) / len(texts)
+        print(f"{name}: {agreement * 100:.2f}% of {len(texts)} sentences match torch")
+        for i in mismatches[:5]:
+            print(f"   - {texts[i]!r}\n       torch: {reference[i]}\n       {name}: {entities[i]}")
+        ok = ok and agreement >= min_agreement
+    return ok
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert the IndoBERT NER model and check backend parity")
+    parser.add_argument("--model-path", default=NER_MODEL_PATH)
+    parser.add_argument("--onnx", action="store_true", help="export the model to ONNX for NER_BACKEND=onnx")
+    parser.add_argument("--opset", type=int, default=14)
+    parser.add_argument("--check", nargs="*", choices=[b for b in BACKENDS if b != "torch"],
+                        help="backends to compare against torch on data/ner_id.json (default: all)")
+    parser.add_argument("--min-agreement", type=float, default=0.99)
+    args = parser.parse_args(argv)
+
+    if args.onnx:
+        print(f"✅ ONNX model written to {export_onnx(args.model_path, args.opset)}")
+
+    if args.check is not None:
+        backends = args.check or [b for b in BACKENDS if b != "torch"]
+        if not check_parity(args.model_path, backends, args.min_agreement):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import os
+import re
+from collections import deque
+
+import pandas as pd
+
+# ==========================================
+# GAZETTEER FAST PATH
+# ==========================================
+# Brand and model names come from a closed vocabulary (the catalog), and
+# RAM / storage / screen / budget follow a handful of surface patterns. One
+# Aho-Corasick pass over the message finds every catalog name and keyword,
+# regexes pick up the numeric specs, and the result has the same
+# {"B-LABEL": [tokens], "I-LABEL": [...]} shape predict_entities returns.
+# When the matches explain enough of the message it is used as is and
+# IndoBERT does not run; otherwise the caller falls back to the model.
+
+GAZETTEER = os.environ.get("GAZETTEER", "1") != "0"
+MIN_COVERAGE = float(os.environ.get("GAZETTEER_MIN_COVERAGE", "0.75"))   # share of content words matched
+
+# Same keywords extract_params maps to a usage
+USAGE_KEYWORDS = {
+    "gaming": "gaming", "game": "gaming", "games": "gaming",
+    "coding": "coding", "programming": "coding", "kuliah": "coding",
+    "editing": "editing", "edit": "editing", "desain": "editing",
+}
+TOUCH_KEYWORDS = ("touchscreen", "touch screen", "layar sentuh")
+
+# Model names that are also everyday words or bare numbers only count right after a brand
+COMMON_WORDS = {
+    "go", "book", "notebook", "thin", "ultra", "edge", "pulse", "delta", "alpha", "neo", "beast", "creator",
+    "electronics", "flex", "summit", "titan", "modern", "bravo", "vector", "gram", "swift", "envy", "yoga",
+}
+
+# Words that carry no entity: request phrasing, fillers, and the unit/label words around the specs
+FILLER_WORDS = {
+    "laptop", "laptops", "notebook", "mau", "cari", "carikan", "saya", "aku", "gue", "gw", "yang", "yg", "untuk",
+    "buat", "utk", "dengan", "dan", "atau", "ada", "rekomendasi", "rekomendasikan", "rekomen", "saran", "dong",
+    "ya", "tolong", "butuh", "pengen", "pingin", "ingin", "di", "ke", "ini", "itu", "apa", "apakah", "berapa",
+    "harga", "harganya", "spek", "speknya", "spesifikasi", "gimana", "bagaimana", "budget", "bujet", "dana",
+    "kak", "min", "gan", "bang", "sih", "deh", "nih", "kah", "punya", "seri", "tipe", "model", "merk", "merek",
+    "brand", "ram", "ssd", "hdd", "storage", "penyimpanan", "layar", "inch", "inci", "gb", "tb", "rp", "juta",
+    "jt", "jutaan", "sekitar", "kisaran", "maksimal", "maks", "max", "dibawah", "bawah", "minimal", "min",
+    "murah", "bagus", "terbaik", "baru", "the", "and", "for", "with", "kira", "paling", "kalau",
+    "kalo", "tapi", "aja", "saja", "terus", "juga", "lebih", "sama", "tambah", "plus", "sekarang", "tahun",
+}
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)?")
+
+SIZE = r"(\d+)\s*(gb|tb|g)\b"
+STORAGE_WORDS = r"(?:ssd|hdd|emmc|storage|penyimpanan)"
+# Tried in order, a later pattern never claims text an earlier one matched: "ram 32gb ssd 1tb"
+# is RAM 32 and storage 1TB, not storage 32GB. A bare size is RAM up to BARE_RAM_MAX_GB.
+SIZE_PATTERNS = (
+    ("RAM", re.compile(rf"\bram\s*:?\s*{SIZE}")),
+    ("STORAGE", re.compile(rf"\b{STORAGE_WORDS}\s*:?\s*{SIZE}")),
+    ("RAM", re.compile(rf"\b{SIZE}\s*(?:of\s+)?ram\b")),
+    ("STORAGE", re.compile(rf"\b{SIZE}\s*{STORAGE_WORDS}\b")),
+    (None, re.compile(rf"\b{SIZE}")),
+)
+SCREEN_PATTERN = re.compile(r"\b(\d{2}(?:[.,]\d{1,2})?)\s*(?:inch|inci|in\b|\"|'')|\blayar\s+(\d{2}(?:[.,]\d{1,2})?)\b")
+BUDGET_PATTERN = re.compile(
+    r"\b(\d+(?:[.,]\d+)?)\s*(juta|jt|jutaan)\b"
+    r"|\brp\.?\s*(\d{1,3}(?:[.,]\d{3})+|\d{4,})\b"
+)
+MULTI_LABELS = {"USAGE", "TOUCHSCREEN"}   # labels whose keywords may repeat
+BARE_RAM_MAX_GB = 64          # a bare "16GB" is RAM up to this size, storage above it
+
+class AhoCorasick:
+    """Multi-pattern matcher: every (pattern, value) occurrence in one pass over the text"""
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.output = [[]]
+        for pattern, value in patterns:
+            state = 0
+            for char in pattern:
+                nxt = self.goto[state].get(char)
+                if nxt is None:
+                    nxt = self.goto[state][char] = len(self.goto)
+                    self.goto.append({})
+                    self.output.append([])
+                state = nxt
+            self.output[state].append((len(pattern), value))
+
+        # Failure links, breadth first; a state also reports its fallback's matches
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(char, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+                queue.append(nxt)
+
+    def finditer(self, text):
+        """(start, end, value) of every match, including overlapping ones"""
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for length, value in self.output[state]:
+                yield i + 1 - length, i + 1, value
+
+def _variants(name: str):
+    """Lowercased name, plus its spaceless form for multi-word names ("macbook air" / "macbookair")"""
+    lowered = " ".join(name.lower().split())
+    yield lowered
+    compact = re.sub(r"[\s\-]+", "", lowered)
+    if compact != lowered:
+        yield compact
+
+def _tokens(label: str, text: str) -> dict:
+    """B-/I- token lists for one entity, split on whitespace like the NER words"""
+    words = text.split()
+    entities = {f"B-{label}": words[:1]}
+    if len(words) > 1:
+        entities[f"I-{label}"] = words[1:]
+    return entities
+
+class GazetteerMatch:
+    """Entities found in one message and how much of it they explain"""
+    __slots__ = ("entities", "coverage")
+
+    def __init__(self, entities, coverage):
+        self.entities = entities
+        self.coverage = coverage
+
+    @property
+    def confident(self) -> bool:
+        return bool(self.entities) and self.coverage >= MIN_COVERAGE
+
+class Gazetteer:
+    """Catalog brand/model names and spec keywords, matched without the NER model"""
+
+    def __init__(self, brands, models_by_brand):
+        patterns = []
+        self.model_brands = {}            # lowercased model -> brands that sell it
+        for brand in brands:
+            for variant in _variants(brand):
+                patterns.append((variant, ("BRAND", brand)))
+        for brand, models in models_by_brand.items():
+            for model in models:
+                self.model_brands.setdefault(model.lower(), set()).add(brand)
+                for variant in _variants(model):
+                    patterns.append((variant, ("MODEL", model)))
+        for keyword in USAGE_KEYWORDS:
+            patterns.append((keyword, ("USAGE", keyword)))
+        for keyword in TOUCH_KEYWORDS:
+            patterns.append((keyword, ("TOUCHSCREEN", keyword)))
+        self.matcher = AhoCorasick(patterns)
+
+    @classmethod
+    def from_catalog(cls, df: pd.DataFrame) -> "Gazetteer":
+        pairs = df[["Brand", "Model"]].dropna().astype(str).drop_duplicates()
+        models = {brand: sorted(group["Model"].unique()) for brand, group in pairs.groupby("Brand")}
+        return cls(sorted(df["Brand"].dropna().astype(str).unique()), models)
+
+    def _names(self, text):
+        """Non-overlapping word-bounded name/keyword matches, leftmost-longest first"""
+        found = []
+        for start, end, value in self.matcher.finditer(text):
+            if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                found.append((start, end, value))
+        found.sort(key=lambda m: (m[0], m[0] - m[1]))
+        chosen, last_end = [], 0
+        for start, end, value in found:
+            if start >= last_end:
+                chosen.append((start, end, value))
+                last_end = end
+        return chosen
+
+    def match(self, text: str) -> GazetteerMatch:
+        lowered = " ".join(text.lower().split())
+        spans = []                        # (start, end, label, entity text)
+
+        # Numeric specs first; a name inside one of them (e.g. model "17" in "17 inch") is ignored
+        for label, pattern in SIZE_PATTERNS:
+            for match in pattern.finditer(lowered):
+                if any(s < match.end() and match.start() < e for s, e, _, _ in spans):
+                    continue
+                size = int(match.group(1)) * (1000 if match.group(2) == "tb" else 1)
+                if label is None:
+                    label = "STORAGE" if size > BARE_RAM_MAX_GB else "RAM"
+                spans.append((match.start(), match.end(), label, f"{size}gb"))
+        for match in SCREEN_PATTERN.finditer(lowered):
+            spans.append((match.start(), match.end(), "SCREEN_SIZE", (match.group(1) or match.group(2)).replace(",", ".")))
+        for match in BUDGET_PATTERN.finditer(lowered):
+            if match.group(1):
+                spans.append((match.start(), match.end(), "BUDGET", f"{match.group(1)} {match.group(2)}"))
+            else:
+                spans.append((match.start(), match.end(), "BUDGET", re.sub(r"[.,]", "", match.group(3))))
+
+        brand_ends = set()
+        for start, end, (label, name) in self._names(lowered):
+            if any(s < end and start < e for s, e, _, _ in spans):
+                continue
+            if label == "BRAND":
+                brand_ends.add(end)
+            elif label == "MODEL" and (name.lower() in COMMON_WORDS or name.isdigit() or len(name) < 3):
+                if start - 1 not in brand_ends:
+                    continue
+            spans.append((start, end, label, name.lower()))
+        spans.sort()
+
+        # extract_params glues every token of a label together, so keep one value per label:
+        # the first brand/model/spec, and for a range ("6 sampai 8 juta") the upper budget
+        matched, single = spans, {}
+        for span in spans:
+            label = span[2]
+            if label not in MULTI_LABELS and (label not in single or label == "BUDGET"):
+                single[label] = span
+        spans = [span for span in spans if span[2] in MULTI_LABELS or single[span[2]] is span]
+
+        entities = {}
+        labels = {label for _, _, label, _ in spans}
+        if "MODEL" in labels and "BRAND" not in labels:
+            # A model sold by a single brand names it too ("macbook air" -> apple)
+            model = next(value for _, _, label, value in spans if label == "MODEL")
+            brands = self.model_brands.get(model)
+            if brands and len(brands) == 1:
+                entities.update(_tokens("BRAND", next(iter(brands)).lower()))
+        for _, _, label, value in spans:
+            for key, tokens in _tokens(label, value).items():
+                entities.setdefault(key, []).extend(tokens)
+
+        original = " ".join(text.split())
+        return GazetteerMatch(entities, _coverage(lowered, original if len(original) == len(lowered) else lowered, matched))
+
+def _coverage(text: str, original: str, spans) -> float:
+    """Share of the entity-like words in the message that fall inside a match.
+
+    A word is entity-like when it could change the params the NER path would
+    extract: it has a digit ("g15", "8jt"), is capitalized like a name
+    ("Zephyrus"), or sits next to a matched brand/model ("rog strix").
+    Plain descriptive words ("kerja", "ringan") map to no param either way.
+    """
+    names = [(s, e) for s, e, label, _ in spans if label in ("BRAND", "MODEL")]
+    content = covered = 0
+    for word in WORD_PATTERN.finditer(text):
+        start, end = word.span()
+        if any(s <= start < e for s, e, _, _ in spans):
+            content += 1
+            covered += 1
+            continue
+        if word.group() in FILLER_WORDS:
+            continue
+        if (any(char.isdigit() for char in word.group()) or original[start].isupper()
+                or any(e + 1 == start or end + 1 == s for s, e in names)):
+            content += 1
+    return covered / content if content else 1.0
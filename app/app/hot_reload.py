@@ -0,0 +1,95 @@
+import logging
+import os
+import threading
+
+from app import chatbot, intent_store, nlp_pipeline, recommender
+
+# ==========================================
+# HOT RELOAD
+# ==========================================
+# A daemon thread polls laptops.csv and the model files. A change is applied
+# once its file has stopped changing for one interval (so a half-written CSV
+# or model directory is not picked up), by building the new object next to
+# the serving one and swapping the reference: requests see the old version
+# or the new one, never a mix. Server processes only; the CLI checks models
+# inline per message.
+
+RELOAD_INTERVAL = float(os.environ.get("HOT_RELOAD_INTERVAL", "2"))   # seconds; 0 disables the watcher
+
+logger = logging.getLogger(__name__)
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+class _Source:
+    """One watched input: how to stamp it and what to call once a new stamp has settled"""
+
+    def __init__(self, name, stamp, apply):
+        self.name = name
+        self.stamp = stamp
+        self.apply = apply
+        # Unknown at start (a forked worker may hold objects loaded before an edit), so
+        # the first settled stamp is applied too; the reload functions no-op when current
+        self.applied = None
+        self.pending = None
+
+    def check(self) -> bool:
+        stamp = self.stamp()
+        settled, self.pending = stamp == self.pending, stamp
+        if stamp == self.applied or not settled:
+            return False
+        # Marked applied even if it fails, so a broken file is not retried every interval
+        self.applied = stamp
+        try:
+            return bool(self.apply())
+        except Exception:
+            logger.exception("reloading %s failed; still serving the previous version", self.name)
+            return False
+
+class Reloader:
+    """Polls the catalog CSV and the published intent / NER models and swaps in new versions"""
+
+    def __init__(self, interval: float = RELOAD_INTERVAL):
+        self.interval = interval
+        self.sources = [
+            _Source("catalog", lambda: _file_stamp(recommender.DATA_PATH), chatbot.reload_catalog),
+            _Source("intent model", lambda: _file_stamp(intent_store.CURRENT_PATH), nlp_pipeline.reload_intent_model),
+            _Source("NER model", nlp_pipeline.ner_fingerprint, nlp_pipeline.reload_ner),
+        ]
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="hot-reload", daemon=True)
+
+    def check(self) -> list:
+        """Names of the sources reloaded by this poll"""
+        reloaded = [source.name for source in self.sources if source.check()]
+        if reloaded:
+            logger.info("reloaded: %s", ", ".join(reloaded))
+        return reloaded
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+_reloader = None
+_reloader_lock = threading.Lock()
+
+def start(interval: float = RELOAD_INTERVAL):
+    """Start the process-wide watcher (once); returns it, or None when disabled"""
+    global _reloader
+    if interval <= 0:
+        return None
+    with _reloader_lock:
+        if _reloader is None:
+            _reloader = Reloader(interval).start()
+        return _reloader
@@ -0,0 +1,164 @@
+import re
+from collections import defaultdict
+
+import numpy as np
+
+from app.gazetteer import FILLER_WORDS, USAGE_KEYWORDS
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Free-text query words that name no product: request phrasing, usages, and
+# spec words that appear in many full names ("Intel Core i7/16GB/512GB SSD")
+GENERIC_WORDS = FILLER_WORDS | set(USAGE_KEYWORDS) | {
+    "laptop", "notebook", "gaming", "intel", "core", "amd", "ryzen", "nvidia", "geforce", "rtx", "gtx",
+    "i3", "i5", "i7", "i9", "celeron", "pentium", "evo", "windows", "win", "touch", "touchscreen",
+}
+SPEC_TOKEN_PATTERN = re.compile(r"\d+(?:gb|tb|mb|g|hz|inch|in)")
+MIN_TOKEN_SHARE = 0.5         # share of the query words a row without a brand/model word hit must match
+
+def tokenize(text) -> list:
+    """Lowercase alphanumeric tokens of `text`"""
+    if not isinstance(text, str):
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+def compact(text) -> str:
+    """Tokens glued together, so 'ROG Strix', 'rog-strix' and 'rogstrix' share one key"""
+    return "".join(tokenize(text))
+
+def _trigrams(key):
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+class _KeyIndex:
+    """Maps compact keys to catalog rows, with a trigram index for substring queries"""
+
+    def __init__(self, values):
+        rows_by_key = defaultdict(list)
+        for row, value in enumerate(values):
+            key = compact(value)
+            if key:
+                rows_by_key[key].append(row)
+
+        self.keys = list(rows_by_key)
+        self.rows = [np.asarray(rows_by_key[key], dtype=np.int64) for key in self.keys]
+        self.key_ids = {key: i for i, key in enumerate(self.keys)}
+
+        self.trigrams = defaultdict(set)
+        for key_id, key in enumerate(self.keys):
+            for gram in _trigrams(key):
+                self.trigrams[gram].add(key_id)
+
+    def containing(self, query):
+        """Ids of the keys that contain `query` as a substring"""
+        if len(query) < 3:
+            return [i for i, key in enumerate(self.keys) if query in key]
+
+        grams = sorted(_trigrams(query), key=lambda g: len(self.trigrams.get(g, ())))
+        candidates = set(self.trigrams.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates &= self.trigrams.get(gram, set())
+        return sorted(i for i in candidates if query in self.keys[i])
+
+    def rows_containing(self, query):
+        """Sorted rows whose key contains `query`, plus the rows whose key equals it"""
+        key_ids = self.containing(query)
+        if not key_ids:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        rows = np.sort(np.concatenate([self.rows[i] for i in key_ids]))
+        exact_id = self.key_ids.get(query)
+        exact = self.rows[exact_id] if exact_id is not None else np.empty(0, dtype=np.int64)
+        return rows, exact
+
+# ==========================================
+# PRODUCT LOOKUP
+# ==========================================
+class ProductLookup:
+    """Brand/model/name lookup over the catalog, built once per catalog load.
+
+    Brand, Model and the full `Laptop` name are indexed by compact key (with a
+    trigram index for substring matches) and the name is also indexed by
+    token, so a lookup is a dictionary hit plus a posting-list intersection.
+    """
+
+    def __init__(self, df):
+        self.size = len(df)
+        self.brands = _KeyIndex(df["Brand"])
+        self.models = _KeyIndex(df["Model"])
+        self.names = _KeyIndex(df["Laptop"])
+
+        postings = defaultdict(set)
+        for column in ("Laptop", "Brand", "Model"):
+            for row, value in enumerate(df[column]):
+                for token in tokenize(value):
+                    postings[token].add(row)
+        self.postings = {token: np.fromiter(sorted(rows), dtype=np.int64, count=len(rows))
+                         for token, rows in postings.items()}
+        # Tokens of Brand or Model alone, so a text query must name the product, not just share a spec
+        self.product_tokens = {token for column in ("Brand", "Model") for value in df[column] for token in tokenize(value)}
+
+    def _token_hits(self, tokens):
+        """Number of distinct query tokens found per row"""
+        lists = [self.postings[t] for t in set(tokens) if t in self.postings]
+        if not lists:
+            return np.zeros(self.size, dtype=np.int64)
+        return np.bincount(np.concatenate(lists), minlength=self.size)
+
+    def search(self, brand=None, model=None, text=None):
+        """Row ids matching the query, best match first.
+
+        `brand` and `model` must both match (brand against Brand, model against
+        Model or the full name). `text` is a free-form fallback where rows are
+        ranked by how many of its tokens appear in the product name; generic
+        and spec words ("laptop", "gaming", "16gb") are ignored.
+        """
+        brand_key = compact(brand)
+        model_key = compact(model)
+
+        if brand_key or model_key:
+            score = np.zeros(self.size, dtype=np.int64)
+            candidates = None
+
+            if brand_key:
+                rows, exact = self.brands.rows_containing(brand_key)
+                score[exact] += 4
+                candidates = rows
+
+            if model_key:
+                model_rows, model_exact = self.models.rows_containing(model_key)
+                name_rows, _ = self.names.rows_containing(model_key)
+                score[model_rows] += 2
+                score[model_exact] += 2
+                rows = np.union1d(model_rows, name_rows)
+                candidates = rows if candidates is None else np.intersect1d(candidates, rows, assume_unique=True)
+
+            if not len(candidates):
+                return candidates
+            score = score + self._token_hits(tokenize(brand) + tokenize(model))
+        else:
+            tokens = [t for t in tokenize(text) if t not in GENERIC_WORDS and not SPEC_TOKEN_PATTERN.fullmatch(t)]
+            words = [t for t in tokens if not t.isdigit()]
+            if not words:
+                return np.empty(0, dtype=np.int64)
+            score = self._token_hits(tokens)
+            # A row counts when it matches a brand/model word of the query or enough of its words
+            named = self._token_hits([t for t in words if t in self.product_tokens])
+            candidates = np.flatnonzero((named > 0) | (self._token_hits(words) >= MIN_TOKEN_SHARE * len(set(words))))
+
+            # Query glued together (e.g. "rogstrix") still matches by substring
+            term_key = "".join(words)
+            if not len(candidates) and len(term_key) > 2:
+                candidates = self.names.rows_containing(term_key)[0]
+                if not len(candidates):
+                    return candidates
+
+        # Highest score first, catalog order among ties
+        order = np.lexsort((candidates, -score[candidates]))
+        return candidates[order]
+
+    def best_match(self, brand=None, model=None, text=None):
+        """Row id of the best match, or None"""
+        rows = self.search(brand=brand, model=model, text=text)
+        return int(rows[0]) if len(rows) else None
@@ -0,0 +1,97 @@
+import os
+
+# ==========================================
+# NER BACKENDS
+# ==========================================
+# Every backend exposes the tokenizer, the label map, the tensor type its
+# inputs must be padded to ("pt" or "np") and logits(batch) -> numpy array,
+# so nlp_pipeline can run any of them the same way.
+
+BACKENDS = ("torch", "torch-int8", "onnx")
+
+ONNX_DIRNAME = "onnx"
+ONNX_FILENAME = "model.onnx"
+
+def onnx_path(model_path: str) -> str:
+    return os.path.join(model_path, ONNX_DIRNAME, ONNX_FILENAME)
+
+def _load_tokenizer(model_path):
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(model_path, local_files_only=True, trust_remote_code=False)
+
+def _load_torch_model(model_path):
+    from transformers import AutoModelForTokenClassification
+    model = AutoModelForTokenClassification.from_pretrained(model_path, local_files_only=True, trust_remote_code=False)
+    model.eval()
+    return model
+
+class TorchBackend:
+    """fp32 PyTorch eager model (GPU when available)"""
+
+    name = "torch"
+    tensor_type = "pt"
+
+    def __init__(self, model_path):
+        import torch
+
+        self._torch    = torch
+        self.device    = "cuda" if torch.cuda.is_available() else "cpu"
+        self.tokenizer = _load_tokenizer(model_path)
+        self.model     = self._prepare(_load_torch_model(model_path))
+        self.id2label  = self.model.config.id2label
+
+    def _prepare(self, model):
+        return model.to(self.device)
+
+    def logits(self, batch):
+        with self._torch.no_grad():
+            return self.model(**batch.to(self.device)).logits.cpu().numpy()
+
+class QuantizedTorchBackend(TorchBackend):
+    """PyTorch model with Linear layers dynamically quantized to INT8 (CPU only)"""
+
+    name = "torch-int8"
+
+    def _prepare(self, model):
+        self.device = "cpu"
+        return self._torch.quantization.quantize_dynamic(model, {self._torch.nn.Linear}, dtype=self._torch.qint8)
+
+class OnnxBackend:
+    """ONNX export of the model run with ONNX Runtime on CPU"""
+
+    name = "onnx"
+    tensor_type = "np"
+    device = "cpu"
+
+    def __init__(self, model_path):
+        try:
+            import onnxruntime
+        except ImportError as exc:
+            raise ImportError("NER_BACKEND=onnx needs the onnxruntime package (pip install onnxruntime)") from exc
+
+        path = onnx_path(model_path)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found, run `python -m app.export_ner --onnx` first")
+
+        from transformers import AutoConfig
+
+        self.tokenizer = _load_tokenizer(model_path)
+        self.id2label  = AutoConfig.from_pretrained(model_path, local_files_only=True).id2label
+        self.session   = onnxruntime.InferenceSession(path, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def logits(self, batch):
+        feed = {name: batch[name].astype("int64") for name in self.input_names if name in batch}
+        return self.session.run(None, feed)[0]
+
+_BACKEND_CLASSES = {
+    "torch": TorchBackend,
+    "torch-int8": QuantizedTorchBackend,
+    "onnx": OnnxBackend,
+}
+
+def load_backend(name: str, model_path: str):
+    """Instantiate the NER backend called `name` over the model in `model_path`"""
+    if name not in _BACKEND_CLASSES:
+        raise ValueError(f"Unknown NER backend {name!r}, expected one of {', '.join(BACKENDS)}")
+    return _BACKEND_CLASSES[name](model_path)
@@ -1,67 +1,292 @@
-from transformers import AutoTokenizer, AutoModelForTokenClassification
-import torch
 import os
 from pathlib import Path
 import pickle
-import re
-import string
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional
 
-device = "cuda" if torch.cuda.is_available() else "cpu"
+from app import intent_store
+from app.ner_backends import load_backend
+from app.preprocessing import preprocess_text
 
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Load the simple intent model (pickle)
 INTENT_MODEL_PATH = os.path.join(SCRIPT_DIR, "models", "intent_model_simple.pkl")
-with open(INTENT_MODEL_PATH, "rb") as f:
-    intent_model = pickle.load(f)
-
-def preprocess_text(text):
-    """Preprocess text for intent prediction"""
-    text = text.lower()
-    text = re.sub(r'http\S+|www.\S+', '', text)
-    emoji_pattern = re.compile("["
-                           "\U0001F600-\U0001F64F"
-                           "\U0001F300-\U0001F5FF"
-                           "\U0001F680-\U0001F6FF"
-                           "\U0001F1E0-\U0001F1FF"
-                           "\U00002702-\U000027B0"
-                           "\U000024C2-\U0001F251"
-                           "]+", flags=re.UNICODE)
-    text = emoji_pattern.sub(r'', text)
-    text = text.translate(str.maketrans('', '', string.punctuation))
-    text = re.sub(r'[^a-zA-Z0-9\s]', '', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+NER_MODEL_PATH = os.path.join(SCRIPT_DIR, "models", "indobert_ner")
+
+# "torch" (fp32), "torch-int8" (dynamic INT8 quantization) or "onnx" (ONNX Runtime)
+NER_BACKEND = os.environ.get("NER_BACKEND", "torch")
+
+# ==========================================
+# LAZY MODEL LOADING
+# ==========================================
+# Models load on first use (or via warmup()) so importing this module is
+# cheap and replies that never touch NER are not held up by torch.
+_intent_model = None
+_intent_version = None       # published version serving now, None for intent_model_simple.pkl
+_intent_swap_hooks = []
+_ner = None
+_ner_fingerprint = None      # ner_fingerprint() of the files _ner was loaded from
+_ner_swap_hooks = []
+_intent_lock = threading.Lock()
+_ner_lock = threading.Lock()
+
+# Seconds spent loading each component, filled in as they load
+load_times = {}
+
+def _load_intent_model():
+    """(model, version) of the published intent model, else of intent_model_simple.pkl"""
+    artifact = intent_store.load_current()
+    if artifact is not None:
+        return artifact["model"], artifact["version"]
+    with open(INTENT_MODEL_PATH, "rb") as f:
+        return pickle.load(f), None
+
+def get_intent_model():
+    """The sklearn intent pipeline, unpickled on first use"""
+    global _intent_model, _intent_version
+    if _intent_model is None:
+        with _intent_lock:
+            if _intent_model is None:
+                start = time.perf_counter()
+                model, version = _load_intent_model()
+                load_times["intent_model"] = time.perf_counter() - start
+                _intent_version = version
+                _intent_model = model
+    return _intent_model
+
+def intent_model_version():
+    return _intent_version
+
+def on_intent_model_swap(hook):
+    """Call hook(version) after every intent model swap (e.g. to drop cached intents)"""
+    _intent_swap_hooks.append(hook)
+
+def swap_intent_model(model, version=None):
+    """Replace the serving intent model; in-flight predictions finish on the old one"""
+    global _intent_model, _intent_version
+    with _intent_lock:
+        _intent_version = version
+        _intent_model = model
+    for hook in _intent_swap_hooks:
+        hook(version)
+
+def reload_intent_model() -> bool:
+    """Swap in the published intent model if it changed since it was loaded; True if swapped"""
+    if _intent_model is None:
+        return False   # not loaded yet; the first get_intent_model() picks up the latest
+    artifact = intent_store.load_current()
+    if artifact is None or artifact["version"] == _intent_version:
+        return False
+    swap_intent_model(artifact["model"], artifact["version"])
+    return True
+
+def get_ner():
+    """The NER backend selected by NER_BACKEND, loaded on first use"""
+    global _ner, _ner_fingerprint
+    if _ner is None:
+        with _ner_lock:
+            if _ner is None:
+                start = time.perf_counter()
+                fingerprint = ner_fingerprint()
+                backend = load_backend(NER_BACKEND, NER_MODEL_PATH)
+                load_times["ner_model"] = time.perf_counter() - start
+                _ner_fingerprint = fingerprint
+                _ner = backend
+    return _ner
+
+def on_ner_model_swap(hook):
+    """Call hook() after every NER model swap (e.g. to drop cached entities)"""
+    _ner_swap_hooks.append(hook)
+
+def reload_ner() -> bool:
+    """Load the NER model again if its files changed since it was loaded and swap it in; True if swapped.
+
+    The new model loads while requests keep using the old one; a batch
+    already running finishes on the backend it started with.
+    """
+    global _ner, _ner_fingerprint
+    if _ner is None:
+        return False   # not loaded yet; the first get_ner() picks up the latest
+    fingerprint = ner_fingerprint()
+    if fingerprint == _ner_fingerprint:
+        return False
+    backend = load_backend(NER_BACKEND, NER_MODEL_PATH)
+    with _ner_lock:
+        _ner_fingerprint = fingerprint
+        _ner = backend
+    for hook in _ner_swap_hooks:
+        hook()
+    return True
+
+def is_ready() -> bool:
+    """True once both models are loaded"""
+    return _intent_model is not None and _ner is not None
+
+def warmup(background: bool = False):
+    """Load both models now; with background=True do it on a daemon thread and return it"""
+    def _load():
+        get_intent_model()
+        get_ner()
+
+    if not background:
+        _load()
+        return None
+    thread = threading.Thread(target=_load, name="nlp-warmup", daemon=True)
+    thread.start()
+    return thread
 
 def predict_intent(text: str):
     """Predict intent using the simple sklearn model"""
     preprocessed = preprocess_text(text)
-    return intent_model.predict([preprocessed])[0]
+    return get_intent_model().predict([preprocessed])[0]
 
-# Load NER model (IndoBERT)
-NER_MODEL_PATH = os.path.join(SCRIPT_DIR, "models", "indobert_ner")
-ner_tokenizer = AutoTokenizer.from_pretrained(NER_MODEL_PATH, local_files_only=True, trust_remote_code=False)
-ner_model     = AutoModelForTokenClassification.from_pretrained(NER_MODEL_PATH, local_files_only=True, trust_remote_code=False).to(device)
-ner_id2label  = ner_model.config.id2label
+def predict_intents(texts: list) -> list:
+    """predict_intent for many texts in one call to the sklearn pipeline"""
+    if not texts:
+        return []
+    return list(get_intent_model().predict([preprocess_text(text) for text in texts]))
 
-def predict_entities(text: str) -> dict:
-    tokens     = ner_tokenizer(text, return_tensors="pt").to(device)
-    with torch.no_grad():
-        outputs = ner_model(**tokens).logits
-    predictions = outputs.argmax(dim=-1)[0].cpu().numpy()
-    tokens_ids  = tokens["input_ids"][0].cpu().numpy()
-    words       = ner_tokenizer.convert_ids_to_tokens(tokens_ids)
-    ents        = {}
-    for idx,pred in enumerate(predictions):
-        label     = ner_id2label[int(pred)]
-        word      = words[idx]
+NER_MAX_LENGTH = 512   # IndoBERT position limit; batches are padded only to their longest member
+NER_BATCH_SIZE = 32
+
+def _decode_entities(ner, word_ids, predictions) -> dict:
+    words = ner.tokenizer.convert_ids_to_tokens(word_ids)
+    ents  = {}
+    for idx, pred in enumerate(predictions):
+        label = ner.id2label[int(pred)]
         if label != "O":
-            ents.setdefault(label, []).append(word)
+            ents.setdefault(label, []).append(words[idx])
     return ents
 
+def predict_entities_batch(texts: list, batch_size: int = NER_BATCH_SIZE, ner=None) -> list:
+    """Run NER over many texts, returning one entity dict per text (same order).
+
+    Texts are tokenized once, bucketed by token length and each bucket is
+    padded only to its own longest member, so one forward pass serves up to
+    `batch_size` texts without wasting compute on padding. `ner` overrides the
+    configured backend (used by the export parity check).
+    """
+    if not texts:
+        return []
+    ner       = ner or get_ner()
+    encodings = ner.tokenizer(list(texts), truncation=True, max_length=NER_MAX_LENGTH)
+    input_ids = encodings["input_ids"]
+
+    order   = sorted(range(len(texts)), key=lambda i: len(input_ids[i]))
+    results = [None] * len(texts)
+    for start in range(0, len(order), batch_size):
+        bucket = order[start:start + batch_size]
+        batch  = ner.tokenizer.pad(
+            {key: [encodings[key][i] for i in bucket] for key in encodings.keys()},
+            padding="longest",
+            return_tensors=ner.tensor_type,
+        )
+        predictions = ner.logits(batch).argmax(axis=-1)
+        for row, i in enumerate(bucket):
+            length     = len(input_ids[i])
+            results[i] = _decode_entities(ner, input_ids[i], predictions[row][:length])
+    return results
+
+def predict_entities(text: str) -> dict:
+    # Once a micro-batcher is running (server mode), share its forward passes
+    if _micro_batcher is not None:
+        return _micro_batcher.predict(text)
+    return predict_entities_batch([text])[0]
+
+# ==========================================
+# MICRO-BATCHING
+# ==========================================
+class NERMicroBatcher:
+    """Collects concurrent predict_entities calls into shared forward passes.
+
+    The worker thread waits for a first request, keeps gathering more for up
+    to `max_wait_ms` (or until `max_batch` are queued), runs them through
+    predict_entities_batch and resolves each caller's future with its own
+    entity dict.
+    """
+
+    def __init__(self, max_batch: int = NER_BATCH_SIZE, max_wait_ms: float = 5.0):
+        self.max_batch = max_batch
+        self.max_wait  = max_wait_ms / 1000
+        self._queue    = queue.Queue()
+        self._thread   = threading.Thread(target=self._run, name="ner-micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def predict(self, text: str, timeout: Optional[float] = None) -> dict:
+        return self.submit(text).result(timeout)
+
+    def _run(self):
+        while True:
+            batch    = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            pending = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if not pending:
+                continue
+            try:
+                results = predict_entities_batch([text for text, _ in pending], batch_size=self.max_batch)
+            except Exception as exc:
+                for _, future in pending:
+                    future.set_exception(exc)
+            else:
+                for (_, future), ents in zip(pending, results):
+                    future.set_result(ents)
+
+_micro_batcher = None
+_micro_batcher_lock = threading.Lock()
+
+def get_micro_batcher() -> NERMicroBatcher:
+    """Shared micro-batcher, started on first use"""
+    global _micro_batcher
+    with _micro_batcher_lock:
+        if _micro_batcher is None:
+            _micro_batcher = NERMicroBatcher()
+        return _micro_batcher
+
+# Intents whose replies need entities; the rest are answered from the intent alone
+ENTITY_INTENTS = {"ask_recommendation", "ask_specs", "ask_price"}
+
 # make analyze() combine both
 def analyze(text: str):
     intent   = predict_intent(text)
-    entities = predict_entities(text)
+    entities = predict_entities(text) if intent in ENTITY_INTENTS else {}
     return intent, entities
+
+def model_fingerprint() -> tuple:
+    """Backend name plus (path, mtime, size) of every model file; changes whenever a model is replaced"""
+    return (NER_BACKEND, _file_stamps([INTENT_MODEL_PATH, intent_store.CURRENT_PATH]) + ner_fingerprint()[1])
+
+def ner_fingerprint() -> tuple:
+    """Backend name plus (path, mtime, size) of every NER model file"""
+    paths = []
+    if os.path.isdir(NER_MODEL_PATH):
+        for root, _, files in os.walk(NER_MODEL_PATH):
+            paths.extend(os.path.join(root, name) for name in sorted(files))
+    return (NER_BACKEND, _file_stamps(paths))
+
+def _file_stamps(paths) -> tuple:
+    stamps = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        stamps.append((path, st.st_mtime_ns, st.st_size))
+    return tuple(stamps)
@@ -0,0 +1,397 @@
+import heapq
+import json
+import os
+import re
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from app import catalog_store
+from app.cache import LRUCache
+from app.recommender import (
+    CODING_CPU_PATTERN, IDR_PER_USD, RANK_MODES, RESULT_COLUMNS, USAGE_BASELINE, USAGE_WEIGHTS,
+    CatalogIndex, clean,
+)
+
+# ==========================================
+# PARTITIONED (OUT-OF-CORE) CATALOG
+# ==========================================
+# For catalogs larger than memory. A partitioned catalog is a directory:
+#   manifest.json            partitions in catalog order, each with its brand,
+#                            price band, row offset and min/max/count stats
+#   p00012/<column>.bin      raw little-endian column data, memory-mapped
+#   p00012/price_order.bin   price-sorted row order of the partition
+#   p00012/strings.json      interned values of the string columns
+# Rows are grouped by (brand, price band) and a partition holds at most
+# PARTITION_MAX_ROWS rows. A query first drops every partition whose stats
+# prove it cannot match, then scans the rest one at a time and merges their
+# top-k, so memory is bounded by one partition plus k rows.
+
+FORMAT_NAME = "laptop-catalog-partitioned"
+FORMAT_VERSION = 1
+
+PRICE_BANDS_USD = (0, 300, 500, 750, 1000, 1500, 2000, 3000)   # lower edges; NaN prices get the last band
+PARTITION_MAX_ROWS = 200_000
+CSV_CHUNK_ROWS = 100_000
+OPEN_PARTITIONS = int(os.environ.get("CATALOG_OPEN_PARTITIONS", "16"))   # partition indexes kept mapped
+
+NUMERIC_DTYPE = "<f8"
+CODES_DTYPE = "<i4"
+ORDER_DTYPE = "<i8"
+STAT_COLUMNS = ("RAM", "Storage", "Screen", "Final Price")
+SCORE_EPSILON = 1e-9          # slack on score upper bounds against float rounding
+
+def partitioned_path(csv_path: str) -> str:
+    """Directory of the partitioned catalog for `csv_path` (data/laptops.csv -> data/laptops.parts)"""
+    return os.path.splitext(csv_path)[0] + ".parts"
+
+def price_band(prices: np.ndarray, bands=PRICE_BANDS_USD) -> np.ndarray:
+    """Band number of every price; NaN goes to an extra band after the last"""
+    band = np.searchsorted(np.asarray(bands, dtype=float), prices, side="right") - 1
+    band = np.clip(band, 0, len(bands) - 1)
+    band[np.isnan(prices)] = len(bands)
+    return band
+
+# ==========================================
+# BUILD
+# ==========================================
+class _PartitionWriter:
+    """Appends rows to one partition directory, interning strings as it goes"""
+
+    def __init__(self, path, brand, band, string_columns):
+        self.path = path
+        self.brand = brand
+        self.band = band
+        self.rows = 0
+        self.strings = {name: {} for name in string_columns}
+        os.makedirs(path)
+
+    def append(self, chunk: pd.DataFrame):
+        for name in STAT_COLUMNS:
+            self._write(name, chunk[name].to_numpy(dtype=NUMERIC_DTYPE))
+        for name, table in self.strings.items():
+            codes, uniques = pd.factorize(chunk[name])
+            # Chunk-local codes -> partition codes, plus -1 (missing) at the end
+            mapping = np.array([table.setdefault(str(value), len(table)) for value in uniques] + [-1], dtype=CODES_DTYPE)
+            self._write(name, mapping[codes])
+        self.rows += len(chunk)
+
+    def _write(self, name, values: np.ndarray):
+        with open(os.path.join(self.path, f"{name}.bin"), "ab") as f:
+            f.write(values.tobytes())
+
+    def finish(self) -> dict:
+        """Write the price order and string tables; returns the partition's manifest entry"""
+        strings = {name: list(table) for name, table in self.strings.items()}
+        with open(os.path.join(self.path, "strings.json"), "w", encoding="utf-8") as f:
+            json.dump(strings, f, ensure_ascii=False)
+
+        columns = {name: _read(self.path, name, NUMERIC_DTYPE, self.rows) for name in STAT_COLUMNS}
+        price_order = np.argsort(columns["Final Price"], kind="stable").astype(ORDER_DTYPE)
+        price_order.tofile(os.path.join(self.path, "price_order.bin"))
+
+        flags = _flags(
+            {name: _read(self.path, name, CODES_DTYPE, self.rows) for name in ("Touch", "GPU", "CPU")}, strings
+        )
+        ram = columns["RAM"]
+        counts = {
+            "touch_yes": flags["touch_yes"],
+            "touch_no": flags["touch_no"],
+            "gpu": flags["has_gpu"],
+            "gaming": flags["has_gpu"] & (ram >= 8),
+            "coding": flags["coding_cpu"] & (ram >= 8),
+        }
+        stats = {}
+        for name, values in columns.items():
+            present = values[~np.isnan(values)]
+            stats[name] = [float(present.min()), float(present.max())] if len(present) else None
+        return {
+            "dir": os.path.basename(self.path),
+            "brand": self.brand,
+            "band": self.band,
+            "rows": self.rows,
+            "stats": stats,
+            "counts": {name: int(mask.sum()) for name, mask in counts.items()},
+        }
+
+def _read(path, name, dtype, rows):
+    if rows == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(os.path.join(path, f"{name}.bin"), dtype=dtype, mode="r", shape=(rows,))
+
+def _flags(codes: dict, strings: dict) -> dict:
+    """Per-row touch/GPU/coding-CPU masks, evaluated once per distinct string"""
+    def lookup(name, predicate):
+        table = np.array([predicate(value) for value in strings[name]] + [False], dtype=bool)
+        return table[codes[name]]      # code -1 (missing) picks the trailing False
+
+    coding = re.compile(CODING_CPU_PATTERN, flags=re.IGNORECASE)
+    return {
+        "touch_yes": lookup("Touch", lambda v: v.lower() == "yes"),
+        "touch_no": lookup("Touch", lambda v: v.lower() == "no"),
+        "has_gpu": codes["GPU"] != -1,
+        "coding_cpu": lookup("CPU", lambda v: coding.search(v) is not None),
+    }
+
+def _brand_key(brand):
+    return (brand is None, (brand or "").lower(), brand or "")
+
+def build_partitioned(chunks, out_dir: str, sources=(), bands=PRICE_BANDS_USD,
+                      max_rows: int = PARTITION_MAX_ROWS) -> str:
+    """Write cleaned catalog chunks (DataFrames) into a partitioned catalog at `out_dir`.
+
+    Only one chunk is held in memory at a time; rows of a (brand, price band)
+    keep their input order, and a partition that reaches `max_rows` rolls over
+    into a new one.
+    """
+    parent = os.path.dirname(os.path.abspath(out_dir))
+    tmp_dir = tempfile.mkdtemp(prefix=".parts-", dir=parent)
+
+    open_parts = {}          # (brand, band) -> writer still taking rows
+    finished = []
+    integral = {}            # numeric column -> every chunk had an integer dtype
+    string_columns = None
+    for chunk in chunks:
+        if string_columns is None:
+            string_columns = [c for c in chunk.columns if c not in STAT_COLUMNS and c != catalog_store.PRICE_IDR_COLUMN]
+        for name in STAT_COLUMNS:
+            integral[name] = integral.get(name, True) and pd.api.types.is_integer_dtype(chunk[name].dtype)
+
+        bands_of = price_band(chunk["Final Price"].to_numpy(dtype=float), bands)
+        keys = pd.DataFrame({"brand": chunk["Brand"].astype(object).fillna("\0"), "band": bands_of})
+        for (brand, band), positions in keys.groupby(["brand", "band"], sort=False).indices.items():
+            brand = None if brand == "\0" else str(brand)
+            rows = chunk.iloc[positions]
+            while len(rows):
+                writer = open_parts.get((brand, int(band)))
+                if writer is None:
+                    path = os.path.join(tmp_dir, f"p{len(finished) + len(open_parts):05d}")
+                    writer = open_parts[(brand, int(band))] = _PartitionWriter(path, brand, int(band), string_columns)
+                room = max_rows - writer.rows
+                writer.append(rows.iloc[:room])
+                rows = rows.iloc[room:]
+                if writer.rows >= max_rows:
+                    finished.append(open_parts.pop((brand, int(band))).finish())
+    finished.extend(writer.finish() for writer in open_parts.values())
+
+    # Catalog order: brand, then price band, then creation order within a band
+    partitions = sorted(finished, key=lambda p: (_brand_key(p["brand"]), p["band"], p["dir"]))
+    offset = 0
+    for partition in partitions:
+        partition["row_offset"] = offset
+        offset += partition["rows"]
+    max_prices = [p["stats"]["Final Price"][1] for p in partitions if p["stats"]["Final Price"]]
+
+    manifest = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "rows": offset,
+        "bands": list(bands),
+        "max_price": max(max_prices) if max_prices else 0.0,
+        "integral": [name for name in STAT_COLUMNS if integral.get(name)],
+        "string_columns": string_columns or [],
+        "sources": [catalog_store.source_stamp(path) for path in sources],
+        "partitions": partitions,
+    }
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+    catalog_store.replace_dir(tmp_dir, out_dir)
+    return out_dir
+
+def csv_chunks(paths, chunksize: int = CSV_CHUNK_ROWS):
+    """Cleaned DataFrame chunks of one or more catalog CSVs"""
+    for path in paths:
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            yield clean(chunk)
+
+def build_from_csv(paths, out_dir: str, max_rows: int = PARTITION_MAX_ROWS, chunksize: int = CSV_CHUNK_ROWS) -> str:
+    return build_partitioned(csv_chunks(paths, chunksize), out_dir, sources=paths, max_rows=max_rows)
+
+# ==========================================
+# QUERY
+# ==========================================
+class PartitionedCatalog:
+    """recommend() over a partitioned catalog without loading it into memory.
+
+    Row ids are global: a partition's rows follow the partitions before it in
+    manifest order, and "catalog order" means that order.
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != FORMAT_NAME or manifest.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} partitioned catalog")
+        self.path = path
+        self.manifest = manifest
+        self.partitions = manifest["partitions"]
+        self.size = manifest["rows"]
+        self.max_price = manifest["max_price"]
+        self.offsets = np.array([p["row_offset"] for p in self.partitions] + [self.size], dtype=np.int64)
+        self._indexes = LRUCache(maxsize=OPEN_PARTITIONS)
+
+    def _strings(self, part) -> dict:
+        with open(os.path.join(self.path, part["dir"], "strings.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def partition_index(self, number: int) -> CatalogIndex:
+        """CatalogIndex over the memory-mapped columns of one partition"""
+        index = self._indexes.get(number)
+        if index is not None:
+            return index
+        part = self.partitions[number]
+        path = os.path.join(self.path, part["dir"])
+        rows = part["rows"]
+        columns = {name: _read(path, name, NUMERIC_DTYPE, rows) for name in STAT_COLUMNS}
+        codes = {name: _read(path, name, CODES_DTYPE, rows) for name in ("Brand", "Touch", "GPU", "CPU")}
+        flags = _flags(codes, self._strings(part))
+        index = CatalogIndex.from_arrays(
+            ram=columns["RAM"],
+            storage=columns["Storage"],
+            screen=columns["Screen"],
+            price=columns["Final Price"],
+            brand_codes=np.asarray(codes["Brand"]),
+            brands=[part["brand"]] if part["brand"] is not None else [],
+            price_order=_read(path, "price_order", ORDER_DTYPE, rows),
+            max_price=self.max_price,
+            **flags,
+        )
+        self._indexes.put(number, index)
+        return index
+
+    def can_match(self, part, usage=None, budget=None, brand=None, screen_size=None, preference=None,
+                  ram=None, storage=None, touchscreen=None) -> bool:
+        """False when the partition's stats rule out every row (NaN/empty stats never match)"""
+        stats, counts = part["stats"], part["counts"]
+        lo = {name: (v[0] if v else np.nan) for name, v in stats.items()}
+        hi = {name: (v[1] if v else np.nan) for name, v in stats.items()}
+
+        if budget and not lo["Final Price"] <= budget / IDR_PER_USD:
+            return False
+        if brand and (part["brand"] is None or not re.search(brand, part["brand"], flags=re.IGNORECASE)):
+            return False
+        if screen_size:
+            size = float(screen_size)
+            if not (hi["Screen"] >= size - 0.3 and lo["Screen"] <= size + 0.3):
+                return False
+        if preference == "big" and not hi["Screen"] >= 15:
+            return False
+        if preference == "medium" and not (hi["Screen"] >= 14 and lo["Screen"] <= 15):
+            return False
+        if preference == "small" and not lo["Screen"] <= 14:
+            return False
+        if ram and not hi["RAM"] >= ram:
+            return False
+        if storage and not hi["Storage"] >= storage:
+            return False
+        if touchscreen is not None and not counts["touch_yes" if touchscreen else "touch_no"]:
+            return False
+        if usage in ("gaming", "coding") and not counts[usage]:
+            return False
+        if usage == "editing" and not hi["RAM"] >= 16:
+            return False
+        return True
+
+    def score_bound(self, part, usage=None, budget=None, ram=None, storage=None, **_) -> float:
+        """Upper bound of CatalogIndex.score_rows over the partition's rows"""
+        weights = USAGE_WEIGHTS.get(usage, USAGE_WEIGHTS[None])
+        baseline = USAGE_BASELINE.get(usage, USAGE_BASELINE[None])
+        stats = part["stats"]
+
+        def surplus(name, wanted):
+            if not stats[name] or stats[name][1] <= 0:
+                return 0.0
+            return min(max(np.log2(stats[name][1] / wanted), 0.0), 2.0) / 2
+
+        ceiling = budget / IDR_PER_USD if budget else self.max_price
+        headroom = min(max(1 - stats["Final Price"][0] / ceiling, 0.0), 1.0) if ceiling and stats["Final Price"] else 0.0
+        bound = (weights["price"] * headroom
+                 + weights["ram"] * surplus("RAM", ram or baseline["ram"])
+                 + weights["storage"] * surplus("Storage", storage or baseline["storage"])
+                 + weights["gpu"] * (1.0 if part["counts"]["gpu"] else 0.0)
+                 + weights["screen"])
+        return bound + SCORE_EPSILON
+
+    def recommend_rows(self, usage=None, budget=None, brand=None, screen_size=None, preference=None, ram=None,
+                       storage=None, touchscreen=None, k=5, rank_by=None, stats=None):
+        """Global row ids of up to `k` matching laptops, best first; same result as
+        CatalogIndex.top_k over the whole catalog. `stats`, if given, is filled
+        with partition counts (total / pruned / scanned) and rows scanned.
+        """
+        if rank_by not in RANK_MODES:
+            raise ValueError(f"Unknown rank_by: {rank_by!r}")
+        params = dict(usage=usage, budget=budget, brand=brand, screen_size=screen_size, preference=preference,
+                      ram=ram, storage=storage, touchscreen=touchscreen)
+        ranking = {name: params[name] for name in ("usage", "budget", "screen_size", "preference", "ram", "storage")}
+        candidates = [n for n, part in enumerate(self.partitions) if self.can_match(part, **params)]
+        scanned = rows_scanned = 0
+
+        if rank_by == "price":
+            # Cheapest partitions first; stop once a partition's cheapest row is dearer than the k-th best
+            bounds = {n: (self.partitions[n]["stats"]["Final Price"] or [np.inf])[0] for n in candidates}
+            candidates.sort(key=lambda n: bounds[n])
+        elif rank_by == "score":
+            bounds = {n: -self.score_bound(self.partitions[n], **ranking) for n in candidates}
+            candidates.sort(key=lambda n: bounds[n])
+
+        best = []              # (key, global row); keys are ascending-is-better
+        found = []             # rank_by=None: global rows in catalog order
+        for number in candidates:
+            if k <= 0:
+                break
+            if rank_by is None and len(found) >= k:
+                break
+            if rank_by is not None and len(best) >= k and bounds[number] > best[-1][0]:
+                break
+            index = self.partition_index(number)
+            matches = index.filter_rows(**params)
+            scanned += 1
+            rows_scanned += index.size
+            offset = int(self.offsets[number])
+            if rank_by is None:
+                found.extend((matches[:k - len(found)] + offset).tolist())
+                continue
+            top = index.top_k(matches, k, rank_by=rank_by, **ranking)
+            if rank_by == "price":
+                keys = np.nan_to_num(index.price[top], nan=np.inf)
+            else:
+                keys = -index.score_rows(top, **ranking)
+            best = heapq.nsmallest(k, best + list(zip(keys.tolist(), (top + offset).tolist())))
+
+        if stats is not None:
+            stats.update(partitions=len(self.partitions), pruned=len(self.partitions) - len(candidates),
+                         scanned=scanned, rows_scanned=rows_scanned)
+        rows = found if rank_by is None else [row for _, row in best]
+        return np.asarray(rows, dtype=np.int64)
+
+    def take(self, rows, columns=RESULT_COLUMNS) -> pd.DataFrame:
+        """Result frame for the given global row ids (indexed by them), reading only their partitions"""
+        rows = np.asarray(rows, dtype=np.int64)
+        numbers = np.searchsorted(self.offsets, rows, side="right") - 1
+        data = {name: [None] * len(rows) for name in columns}
+        integral = set(self.manifest["integral"])
+        for number in np.unique(numbers):
+            part = self.partitions[number]
+            path = os.path.join(self.path, part["dir"])
+            positions = np.flatnonzero(numbers == number)
+            local = rows[positions] - part["row_offset"]
+            strings = None
+            for name in columns:
+                if name in STAT_COLUMNS:
+                    values = _read(path, name, NUMERIC_DTYPE, part["rows"])[local].tolist()
+                else:
+                    strings = strings or self._strings(part)
+                    table = strings[name] + [np.nan]
+                    values = [table[code] for code in _read(path, name, CODES_DTYPE, part["rows"])[local]]
+                for position, value in zip(positions, values):
+                    data[name][position] = value
+        frame = pd.DataFrame(data, index=rows, columns=list(columns))
+        for name in columns:
+            if name in STAT_COLUMNS:
+                frame[name] = frame[name].astype("int64" if name in integral else "float64")
+        return frame
+
+    def recommend(self, k=5, rank_by=None, **params) -> pd.DataFrame:
+        return self.take(self.recommend_rows(k=k, rank_by=rank_by, **params))
@@ -0,0 +1,139 @@
+import asyncio
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+from app import chatbot, hot_reload, nlp_pipeline, server
+
+# ==========================================
+# PRE-FORK WORKER POOL
+# ==========================================
+# The parent loads the catalog and both models once, then forks the workers:
+# they share the weights copy-on-write and accept on one listening socket.
+# Sessions live in a shared SQLite file so any worker can serve any turn.
+# CPU only: CUDA contexts do not survive fork, so the GPUs are hidden before
+# the models load.
+
+PREFORK_WORKERS = int(os.environ.get("PREFORK_WORKERS", str(os.cpu_count() or 1)))
+WORKER_THREADS = int(os.environ.get("PREFORK_WORKER_THREADS", "2"))   # reply threads per worker
+RESTART_BACKOFF_MAX = 30.0    # seconds between restarts of a worker that keeps dying
+CRASH_WINDOW = 10.0           # a worker dying sooner than this after its start counts as a crash
+
+logger = logging.getLogger(__name__)
+
+def _set_intra_op_threads(workers):
+    """Split the cores between the workers so torch / OpenMP do not oversubscribe"""
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
+    return threads
+
+def _force_cpu():
+    """Hide the GPUs before any model loads, so TorchBackend picks the CPU in the parent and every worker"""
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_initialized():
+        raise RuntimeError("CUDA is already initialized in this process; prefork workers cannot inherit it")
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+
+def _listen(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.setblocking(False)
+    return sock
+
+def _worker(sock, workers, session_path):
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    _set_intra_op_threads(workers)
+    # Threads do not survive fork, so the micro-batcher and the reload watcher start here
+    nlp_pipeline.get_micro_batcher()
+    hot_reload.start()
+    chat_server = server.ChatServer(workers=WORKER_THREADS, session_path=session_path)
+    asyncio.run(chat_server.serve(*sock.getsockname()[:2], sock=sock))
+
+def _spawn(sock, workers, session_path):
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            _worker(sock, workers, session_path)
+        except BaseException as exc:
+            if not isinstance(exc, (KeyboardInterrupt, SystemExit)):
+                logger.exception("worker %d failed: %r", os.getpid(), exc)
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+def serve_prefork(workers: int = PREFORK_WORKERS, host: str = server.HOST, port: int = server.PORT):
+    """Load everything once, fork `workers` servers on one socket and restart any that die"""
+    _force_cpu()
+    started = time.perf_counter()
+    chatbot.warmup()
+    print(f"Model dan katalog dimuat dalam {(time.perf_counter() - started) * 1000:.0f} ms, fork {workers} worker")
+
+    session_path = server.SESSION_SPILL_PATH
+    if not session_path:
+        fd, session_path = tempfile.mkstemp(prefix="chat-sessions-", suffix=".sqlite")
+        os.close(fd)
+
+    # Keep the loaded objects out of the collector so it does not touch (and copy) their pages
+    gc.collect()
+    gc.freeze()
+
+    sock = _listen(host, port)
+    children = {}                  # pid -> (slot, start time)
+    backoff = [0.0] * workers      # per slot
+    for slot in range(workers):
+        children[_spawn(sock, workers, session_path)] = (slot, time.monotonic())
+
+    stopping = False
+
+    def _stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        if pid not in children:
+            continue
+        slot, started_at = children.pop(pid)
+        if stopping:
+            continue
+
+        uptime = time.monotonic() - started_at
+        backoff[slot] = 0.0 if uptime > CRASH_WINDOW else min(RESTART_BACKOFF_MAX, max(0.5, backoff[slot] * 2))
+        logger.warning("worker %d keluar (%d), restart dalam %.1f s", pid, os.waitstatus_to_exitcode(status), backoff[slot])
+        time.sleep(backoff[slot])
+        if not stopping:
+            children[_spawn(sock, workers, session_path)] = (slot, time.monotonic())
+
+    sock.close()
+    if not server.SESSION_SPILL_PATH:
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(session_path + suffix)
+            except OSError:
+                pass
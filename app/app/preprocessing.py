@@ -0,0 +1,63 @@
+import re
+import string
+
+# ==========================================
+# TEXT NORMALIZATION (shared by training and serving)
+# ==========================================
+# Same output as the original pipeline (lowercase, drop URLs, drop emojis,
+# drop punctuation and any other non [a-zA-Z0-9] / non-whitespace character,
+# collapse whitespace), but with the patterns compiled once and the three
+# character-removal passes folded into one str.translate call.
+
+URL_PATTERN = re.compile(r'http\S+|www.\S+')
+
+# Ranges removed by the original emoji pattern; whitespace inside them
+# (e.g. U+3000 ideographic space) is deleted rather than collapsed to a space
+EMOJI_RANGES = (
+    (0x1F600, 0x1F64F),  # emoticons
+    (0x1F300, 0x1F5FF),  # symbols & pictographs
+    (0x1F680, 0x1F6FF),  # transport & map symbols
+    (0x1F1E0, 0x1F1FF),  # flags (iOS)
+    (0x02702, 0x027B0),
+    (0x024C2, 0x1F251),
+)
+
+_KEEP = frozenset(string.ascii_letters + string.digits)
+
+def _in_emoji_range(codepoint):
+    return any(lo <= codepoint <= hi for lo, hi in EMOJI_RANGES)
+
+class _DeletionTable(dict):
+    """str.translate table keeping ASCII letters/digits and whitespace, deleting the rest.
+
+    Entries are filled in on first sight of each code point, so translating
+    stays a single pass however exotic the input is.
+    """
+
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        keep = char in _KEEP or (char.isspace() and not _in_emoji_range(codepoint))
+        value = codepoint if keep else None
+        self[codepoint] = value
+        return value
+
+_DELETE = _DeletionTable()
+for _codepoint in range(128):
+    _DELETE[_codepoint]
+
+def preprocess_text(text):
+    text = text.lower()
+
+    # Remove URLs (skip the regex when there cannot be one)
+    if "http" in text or "www" in text:
+        text = URL_PATTERN.sub('', text)
+
+    # Remove emojis, punctuation and other non-alphanumeric chars in one pass
+    text = text.translate(_DELETE)
+
+    # Collapse whitespace
+    return " ".join(text.split())
+
+def normalize_batch(texts):
+    """preprocess_text over an iterable of texts, returned as a list"""
+    return [preprocess_text(text) for text in texts]
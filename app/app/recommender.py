@@ -1,76 +1,628 @@
 import pandas as pd
+import numpy as np
+import copy
+import json
 import os
+import re
+import threading
+from collections import Counter, OrderedDict
+
+from app import catalog_store
+from app.cache import LRUCache
+from app.gazetteer import Gazetteer
+from app.lookup import ProductLookup
+from app.render import CatalogDisplay
+from app.similarity import SimilarityIndex
 
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_PATH = os.path.join(os.path.dirname(SCRIPT_DIR), "data", "laptops.csv")
+CATALOG_PATH = catalog_store.compiled_path(DATA_PATH)
+
+IDR_PER_USD = 16000
 
 def load_data():
-    df = pd.read_csv(DATA_PATH)
+    """Catalog DataFrame, memory-mapped from the compiled catalog when it is up to date"""
+    if catalog_store.is_fresh(CATALOG_PATH, DATA_PATH):
+        return catalog_store.open_catalog(CATALOG_PATH)
+    return read_csv()
+
+def read_csv(path=DATA_PATH):
+    """Parse and clean the catalog CSV"""
+    return clean(pd.read_csv(path))
 
+def clean(df):
+    """Coerce the numeric columns of a raw catalog frame (or CSV chunk) and add the IDR price"""
     # Cleaning to numeric
     df["RAM"] = pd.to_numeric(df["RAM"], errors="coerce")
     df["Storage"] = pd.to_numeric(df["Storage"], errors="coerce")
     df["Screen"] = pd.to_numeric(df["Screen"], errors="coerce")
     df["Final Price"] = pd.to_numeric(df["Final Price"], errors="coerce")
+    df[catalog_store.PRICE_IDR_COLUMN] = (df["Final Price"] * IDR_PER_USD).round()
 
     return df
 
-def recommend(df, usage=None, budget=None, brand=None, screen_size=None, preference=None, ram=None, storage=None, touchscreen=None):
-    results = df.copy()
-
-    # BRAND FILTER
-    if brand:
-        results = results[results["Brand"].str.contains(brand, case=False, na=False)]
-
-    # SCREEN SIZE EXACT
-    if screen_size:
-        size = float(screen_size)
-        results = results[results["Screen"].between(size - 0.3, size + 0.3)]
-
-    # SCREEN SIZE PREFERENCE
-    if preference:
-        if preference == "big":
-            results = results[results["Screen"] >= 15]
-        elif preference == "medium":
-            results = results[results["Screen"].between(14, 15)]
-        elif preference == "small":
-            results = results[results["Screen"] <= 14]
-
-    # RAM FILTER
-    if ram:
-        results = results[results["RAM"] >= ram]
-    
-    # STORAGE FILTER
-    if storage:
-        results = results[results["Storage"] >= storage]
-
-    # TOUCHSCREEN FILTER
-    if touchscreen is not None:
-        if touchscreen:
-            results = results[results["Touch"].str.lower() == "yes"]
+def build_catalog():
+    """Compile data/laptops.csv into the memory-mappable catalog load_data() prefers"""
+    return catalog_store.build_catalog(read_csv(), DATA_PATH, CATALOG_PATH, idr_per_usd=IDR_PER_USD)
+
+def catalog_version(path=DATA_PATH):
+    """Stamp of the catalog CSV ("<size>-<mtime_ns>"), or None without one; equal stamps mean the same data"""
+    try:
+        stamp = catalog_store.source_stamp(path)
+    except OSError:
+        return None
+    return f"{stamp['size']}-{stamp['mtime_ns']}"
+
+RANK_MODES = (None, "score", "price")
+
+# Per-usage weights for the ranking score components
+USAGE_WEIGHTS = {
+    "gaming":  {"price": 1.0, "ram": 1.5, "storage": 0.5, "gpu": 3.0, "screen": 0.5},
+    "coding":  {"price": 1.5, "ram": 2.0, "storage": 1.0, "gpu": 0.5, "screen": 0.5},
+    "editing": {"price": 1.0, "ram": 2.5, "storage": 1.5, "gpu": 1.5, "screen": 1.0},
+    None:      {"price": 2.0, "ram": 1.0, "storage": 1.0, "gpu": 0.5, "screen": 0.5},
+}
+
+# Baseline RAM/storage (GB) a row is compared against when the user gave none
+USAGE_BASELINE = {
+    "gaming":  {"ram": 8, "storage": 512},
+    "coding":  {"ram": 8, "storage": 256},
+    "editing": {"ram": 16, "storage": 512},
+    None:      {"ram": 8, "storage": 256},
+}
+
+RESULT_COLUMNS = ["Brand", "Model", "GPU", "CPU", "RAM", "Storage", "Screen", "Touch", "Final Price"]
+
+# Columns a catalog reload patches in place (row ids stay valid); a change anywhere else rebuilds everything
+DELTA_COLUMNS = ("Final Price", "Status")
+
+# CPUs that qualify a laptop for usage="coding"
+CODING_CPU_PATTERN = "i5|i7|Ryzen"
+
+# ==========================================
+# CATALOG INDEX
+# ==========================================
+class CatalogIndex:
+    """Column arrays and filter masks precomputed once per catalog load.
+
+    Every mask is a boolean NumPy array aligned with the catalog rows, so a
+    request only ANDs masks together and binary-searches the budget in the
+    price-sorted order instead of copying and rescanning the DataFrame.
+    """
+
+    def __init__(self, df):
+        # Brand codes: the regex in a brand query only runs over the unique names
+        codes, uniques = pd.factorize(df["Brand"])
+        touch = df["Touch"].astype(str).str.lower().to_numpy()
+        self._setup(
+            # Numeric columns (NaN never passes a comparison, same as pandas)
+            ram=df["RAM"].to_numpy(dtype=float),
+            storage=df["Storage"].to_numpy(dtype=float),
+            screen=df["Screen"].to_numpy(dtype=float),
+            price=df["Final Price"].to_numpy(dtype=float),
+            brand_codes=codes,
+            brands=[str(b) for b in uniques],
+            touch_yes=touch == "yes",
+            touch_no=touch == "no",
+            has_gpu=df["GPU"].notna().to_numpy(dtype=bool),
+            coding_cpu=df["CPU"].str.contains(CODING_CPU_PATTERN, case=False, na=False).to_numpy(dtype=bool),
+        )
+        self.df = df
+
+    @classmethod
+    def from_arrays(cls, ram, storage, screen, price, brand_codes, brands, touch_yes, touch_no, has_gpu, coding_cpu,
+                    price_order=None, max_price=None):
+        """Index over precomputed column arrays (e.g. one memory-mapped partition), without a DataFrame.
+
+        `max_price` overrides the price ceiling used for scoring, so a part
+        of a larger catalog scores its rows the same way the whole would.
+        """
+        index = cls.__new__(cls)
+        index._setup(ram, storage, screen, price, brand_codes, brands, touch_yes, touch_no, has_gpu, coding_cpu,
+                     price_order, max_price)
+        index.df = None
+        return index
+
+    def _setup(self, ram, storage, screen, price, brand_codes, brands, touch_yes, touch_no, has_gpu, coding_cpu,
+               price_order=None, max_price=None):
+        self.size = len(price)
+        self.ram = ram
+        self.storage = storage
+        self.screen = screen
+        self.price = price
+        self.brand_codes = brand_codes
+        self.brands = brands
+
+        self.touch_masks = {
+            True: touch_yes,
+            False: touch_no,
+        }
+
+        self.preference_masks = {
+            "big": self.screen >= 15,
+            "medium": (self.screen >= 14) & (self.screen <= 15),
+            "small": self.screen <= 14,
+        }
+
+        self.has_gpu = has_gpu
+        self.usage_masks = {
+            "gaming": has_gpu & (self.ram >= 8),
+            "coding": coding_cpu & (self.ram >= 8),
+            "editing": self.ram >= 16,
+        }
+
+        # Price-sorted order for budget lookups (NaN prices sort last)
+        self.price_order = np.argsort(self.price, kind="stable") if price_order is None else price_order
+        self.sorted_price = self.price[self.price_order]
+        if max_price is None:
+            max_price = float(np.nanmax(self.price)) if self.size and not np.isnan(self.price).all() else 0.0
+        self.max_price = max_price
+        self._distinct = {}           # column name -> sorted distinct non-NaN values, built on demand
+
+    def with_prices(self, df, rows):
+        """Copy of this index over `df`, whose Final Price differs only in `rows`.
+
+        Every mask is shared; the changed rows are taken out of the price
+        order and merged back in at their new places instead of re-sorting.
+        """
+        index = copy.copy(self)
+        rows = np.unique(np.asarray(rows, dtype=np.int64))
+        price = df["Final Price"].to_numpy(dtype=float)
+        index.df = df
+        index.price = price
+
+        kept = np.ones(self.size, dtype=bool)
+        kept[rows] = False
+        order = self.price_order[kept[self.price_order]]
+        rest = price[order]
+        # Same order as a stable argsort: by price (NaN last), ties by row id
+        changed = rows[np.lexsort((rows, price[rows]))]
+        lo = np.searchsorted(rest, price[changed], side="left")
+        hi = np.searchsorted(rest, price[changed], side="right")
+        positions = [start + np.searchsorted(order[start:end], row) for row, start, end in zip(changed, lo, hi)]
+        index.price_order = np.insert(order, positions, changed)
+        index.sorted_price = price[index.price_order]
+        index.max_price = float(np.nanmax(price)) if self.size and not np.isnan(price).all() else 0.0
+        return index
+
+    def brand_codes_matching(self, brand):
+        """Brand codes whose name matches `brand` like `str.contains(brand, case=False)`"""
+        pattern = re.compile(brand, flags=re.IGNORECASE)
+        return [code for code, name in enumerate(self.brands) if pattern.search(name)]
+
+    def brand_mask(self, brand):
+        """Rows whose Brand matches `brand` like `str.contains(brand, case=False)`"""
+        return np.isin(self.brand_codes, self.brand_codes_matching(brand))
+
+    def budget_rows(self, budget_usd):
+        """Row ids (catalog order) with a price at or below `budget_usd`"""
+        count = np.searchsorted(self.sorted_price, budget_usd, side="right")
+        return np.sort(self.price_order[:count])
+
+    def filter_rows(self, usage=None, budget=None, brand=None, screen_size=None, preference=None, ram=None, storage=None, touchscreen=None, candidates=None):
+        """Row ids (catalog order) matching every given criterion.
+
+        With `candidates` (sorted row ids, e.g. an earlier result set) only
+        those rows are evaluated, so narrowing a search costs proportional to
+        the remaining candidates instead of the catalog.
+        """
+        if candidates is not None:
+            rows = np.asarray(candidates)
+        elif budget:
+            rows = self.budget_rows(budget / IDR_PER_USD)
+        else:
+            rows = None
+        sel = slice(None) if rows is None else rows
+
+        masks = []
+
+        if brand:
+            masks.append(np.isin(self.brand_codes[sel], self.brand_codes_matching(brand)))
+
+        if screen_size:
+            size = float(screen_size)
+            screen = self.screen[sel]
+            masks.append((screen >= size - 0.3) & (screen <= size + 0.3))
+
+        if preference in self.preference_masks:
+            masks.append(self.preference_masks[preference][sel])
+
+        if ram:
+            masks.append(self.ram[sel] >= ram)
+
+        if storage:
+            masks.append(self.storage[sel] >= storage)
+
+        if touchscreen is not None:
+            masks.append(self.touch_masks[bool(touchscreen)][sel])
+
+        if usage in self.usage_masks:
+            masks.append(self.usage_masks[usage][sel])
+
+        if budget and candidates is not None:
+            masks.append(self.price[sel] <= budget / IDR_PER_USD)
+
+        mask = None
+        for m in masks:
+            mask = m if mask is None else mask & m
+
+        if rows is None:
+            return np.arange(self.size) if mask is None else np.flatnonzero(mask)
+        return rows if mask is None else rows[mask]
+
+    def criterion_masks(self, usage=None, budget=None, brand=None, screen_size=None, preference=None, ram=None, storage=None, touchscreen=None):
+        """{criterion: boolean mask over every row} for each criterion filter_rows() would apply"""
+        masks = {}
+        if usage in self.usage_masks:
+            masks["usage"] = self.usage_masks[usage]
+        if budget:
+            masks["budget"] = self.price <= budget / IDR_PER_USD
+        if brand:
+            masks["brand"] = self.brand_mask(brand)
+        if screen_size:
+            size = float(screen_size)
+            masks["screen_size"] = (self.screen >= size - 0.3) & (self.screen <= size + 0.3)
+        if preference in self.preference_masks:
+            masks["preference"] = self.preference_masks[preference]
+        if ram:
+            masks["ram"] = self.ram >= ram
+        if storage:
+            masks["storage"] = self.storage >= storage
+        if touchscreen is not None:
+            masks["touchscreen"] = self.touch_masks[bool(touchscreen)]
+        return masks
+
+    def _distinct_values(self, name):
+        values = self._distinct.get(name)
+        if values is None:
+            column = getattr(self, name)
+            values = self._distinct[name] = np.unique(column[~np.isnan(column)])
+        return values
+
+    def filter_key(self, usage=None, budget=None, brand=None, screen_size=None, preference=None, ram=None, storage=None, touchscreen=None):
+        """Hashable key that is equal for any two criteria filter_rows() gives the same rows.
+
+        Budgets become how many prices they cover, RAM/storage minimums and
+        screen sizes positions among the column's distinct values, and a brand
+        pattern the brand codes it matches, so "8 juta" and "8.1 juta" share a
+        key when no laptop is priced between them.
+        """
+        key = [usage if usage in self.usage_masks else None]
+        key.append(int(np.searchsorted(self.sorted_price, budget / IDR_PER_USD, side="right")) if budget else None)
+        key.append(tuple(self.brand_codes_matching(brand)) if brand else None)
+        if screen_size:
+            size = float(screen_size)
+            screens = self._distinct_values("screen")
+            lo = int(np.searchsorted(screens, size - 0.3, side="left"))
+            hi = int(np.searchsorted(screens, size + 0.3, side="right"))
+            key.append((lo, hi) if lo < hi else ())
+        else:
+            key.append(None)
+        key.append(preference if preference in self.preference_masks else None)
+        for name, minimum in (("ram", ram), ("storage", storage)):
+            key.append(int(np.searchsorted(self._distinct_values(name), minimum, side="left")) if minimum else None)
+        key.append(None if touchscreen is None else bool(touchscreen))
+        return tuple(key)
+
+    def ranking_key(self, rank_by=None, usage=None, budget=None, screen_size=None, preference=None, ram=None, storage=None):
+        """Hashable key of the criteria top_k() orders `rank_by` results by (the exact values, unlike filter_key)"""
+        if rank_by != "score":
+            return ()
+        return (
+            usage if usage in USAGE_WEIGHTS else None,
+            float(budget) if budget else None,
+            float(screen_size) if screen_size else None,
+            preference if not screen_size and preference in self.preference_masks else None,
+            float(ram) if ram else None,
+            float(storage) if storage else None,
+        )
+
+    def score_rows(self, rows, usage=None, budget=None, screen_size=None, preference=None, ram=None, storage=None):
+        """Vectorized ranking score for the given rows (higher is better)"""
+        weights = USAGE_WEIGHTS.get(usage, USAGE_WEIGHTS[None])
+        baseline = USAGE_BASELINE.get(usage, USAGE_BASELINE[None])
+        price = self.price[rows]
+
+        # Price headroom: share of the budget (or of the priciest laptop) left over
+        ceiling = budget / IDR_PER_USD if budget else self.max_price
+        headroom = np.clip(1 - price / ceiling, 0, 1) if ceiling else np.zeros(len(rows))
+
+        # RAM/storage surplus over what was asked for, in doublings capped at 2
+        # (a 0 GB row gives log2(0) = -inf, which the clip turns into 0)
+        with np.errstate(divide="ignore"):
+            ram_surplus = np.clip(np.log2(self.ram[rows] / (ram or baseline["ram"])), 0, 2) / 2
+            storage_surplus = np.clip(np.log2(self.storage[rows] / (storage or baseline["storage"])), 0, 2) / 2
+
+        gpu = self.has_gpu[rows].astype(float)
+
+        screen = self.screen[rows]
+        if screen_size:
+            screen_match = np.clip(1 - np.abs(screen - float(screen_size)) / 0.3, 0, 1)
+        elif preference in self.preference_masks:
+            screen_match = self.preference_masks[preference][rows].astype(float)
+        else:
+            screen_match = np.zeros(len(rows))
+
+        score = (weights["price"] * headroom
+                 + weights["ram"] * ram_surplus
+                 + weights["storage"] * storage_surplus
+                 + weights["gpu"] * gpu
+                 + weights["screen"] * screen_match)
+        return np.nan_to_num(score, nan=0.0)
+
+    def top_k(self, rows, k, rank_by=None, **params):
+        """Best `k` of `rows`, using a partial selection instead of a full sort.
+
+        Ties are broken by catalog row id so the result is deterministic.
+        """
+        if rank_by not in RANK_MODES:
+            raise ValueError(f"Unknown rank_by: {rank_by!r}")
+        if rank_by is None or k <= 0:
+            return rows[:max(k, 0)]
+
+        if rank_by == "price":
+            keys = np.nan_to_num(self.price[rows], nan=np.inf)
         else:
-            results = results[results["Touch"].str.lower() == "no"]
+            keys = -self.score_rows(rows, **params)
+
+        if len(rows) > k:
+            # Keep everything tied with the k-th key so the row id tie-break stays exact
+            kth = np.partition(keys, k - 1)[k - 1]
+            keep = keys <= kth
+            rows, keys = rows[keep], keys[keep]
+
+        order = np.lexsort((rows, keys))[:k]
+        return rows[order]
+
+    def take(self, rows):
+        """Result frame for the given row ids"""
+        return self.df.iloc[rows][RESULT_COLUMNS]
+
+class Catalog:
+    """Catalog DataFrame together with the indexes and display strings built on top of it.
+
+    A Catalog is never modified: a reload builds a new one (sharing whatever
+    did not change) and swaps it in, so a request holding one sees a
+    consistent snapshot. `version` identifies the data it was built from.
+    """
+
+    def __init__(self, df, version=None):
+        self.df = df
+        self.version = version
+        self.index = CatalogIndex(df)
+        self.lookup = ProductLookup(df)
+        self.gazetteer = Gazetteer.from_catalog(df)
+        self.display = CatalogDisplay(df, RESULT_COLUMNS, IDR_PER_USD)
+        self.similarity = SimilarityIndex(df)
+
+    def with_changes(self, df, changes: dict, version=None) -> "Catalog":
+        """Catalog over `df`, which differs from this one only in `changes` ({column: row ids})"""
+        catalog = copy.copy(self)
+        catalog.df = df
+        catalog.version = version
+        rows = np.unique(np.concatenate([np.asarray(r, dtype=np.int64) for r in changes.values()] or [[]]))
+        if len(changes.get("Final Price", ())):
+            catalog.index = self.index.with_prices(df, changes["Final Price"])
+            catalog.similarity = self.similarity.with_prices(catalog.index.price)
+        else:
+            # Same masks and price order; results are still taken from the new frame
+            catalog.index = copy.copy(self.index)
+            catalog.index.df = df
+        catalog.display = self.display.updated(df, rows)
+        return catalog
+
+    def reload(self, path=DATA_PATH) -> "Catalog":
+        """This catalog if the CSV is unchanged, else a new one: patched for price/status-only changes, rebuilt otherwise"""
+        version = catalog_version(path)
+        if version == self.version:
+            return self
+        df = read_csv(path)
+        changes = changed_rows(self.df, df)
+        if changes is None:
+            return Catalog(df, version)
+        return self.with_changes(df, changes, version)
+
+def changed_rows(old: pd.DataFrame, new: pd.DataFrame):
+    """{column: row ids whose value changed} over DELTA_COLUMNS, or None when the
+    catalogs differ in anything else (rows added, removed or reordered, specs edited)
+    """
+    if len(old) != len(new) or list(old.columns) != list(new.columns):
+        return None
+    changes = {}
+    for name in new.columns:
+        if name == catalog_store.PRICE_IDR_COLUMN:
+            continue   # derived from Final Price
+        if name in catalog_store.NUMERIC_COLUMNS:
+            a, b = old[name].to_numpy(dtype=float), new[name].to_numpy(dtype=float)
+            differs = (a != b) & ~(np.isnan(a) & np.isnan(b))
+        else:
+            a, b = old[name].to_numpy(dtype=object), new[name].to_numpy(dtype=object)
+            differs = (a != b) & ~(pd.isna(a) & pd.isna(b))
+        if not differs.any():
+            continue
+        if name not in DELTA_COLUMNS:
+            return None
+        changes[name] = np.flatnonzero(differs)
+    return changes
+
+def load_catalog():
+    # Stamp first: an edit racing the read shows up as a changed version on the next check
+    version = catalog_version()
+    return Catalog(load_data(), version)
+
+def merge_params(old: dict, new: dict):
+    """Merge follow-up params into earlier ones.
+
+    Returns (merged, narrowing) where narrowing is True when every matched row
+    of `merged` also matched `old`, i.e. the follow-up only added or tightened
+    constraints and the earlier candidates can be refined instead of rescanned.
+    """
+    merged = {**old, **new}
+    narrowing = True
+    for field, value in new.items():
+        if field not in old or old[field] is None:
+            continue
+        previous = old[field]
+        if field in ("ram", "storage"):
+            narrowing = narrowing and value >= previous
+        elif field == "budget":
+            narrowing = narrowing and value <= previous
+        elif field == "brand":
+            narrowing = narrowing and str(value).lower() == str(previous).lower()
+        else:
+            narrowing = narrowing and value == previous
+    return merged, narrowing
+
+PARAM_NAMES = ("usage", "budget", "brand", "screen_size", "preference", "ram", "storage", "touchscreen")
+RANKING_PARAMS = ("usage", "budget", "screen_size", "preference", "ram", "storage")
+
+def search_rows(index, params: dict, k=5, rank_by=None, candidates=None):
+    """(all matching row ids in catalog order, best `k` of them) for recommend-style params"""
+    matches = index.filter_rows(**params, candidates=candidates)
+    ranking = {name: params.get(name) for name in RANKING_PARAMS}
+    return matches, index.top_k(matches, k, rank_by=rank_by, **ranking)
+
+def recommend_rows(index, usage=None, budget=None, brand=None, screen_size=None, preference=None, ram=None, storage=None, touchscreen=None, k=5, rank_by=None, candidates=None):
+    """Row ids of up to `k` matching laptops in a CatalogIndex, best first"""
+    params = dict(usage=usage, budget=budget, brand=brand, screen_size=screen_size, preference=preference,
+                  ram=ram, storage=storage, touchscreen=touchscreen)
+    return search_rows(index, params, k=k, rank_by=rank_by, candidates=candidates)[1]
+
+# ==========================================
+# RESULT CACHE
+# ==========================================
+# Chat traffic repeats a small set of requests ("laptop gaming 15 juta").
+# Results are memoized per catalog version under a canonical key, so a
+# popular request returns its row ids without running the filter engine.
+# Matches are keyed by CatalogIndex.filter_key, which buckets budgets and
+# sizes into the ranges that select the same rows; the top-k additionally
+# by the exact ranking criteria, since the score uses the exact values.
+
+RECOMMEND_CACHE_SIZE = int(os.environ.get("RECOMMEND_CACHE_SIZE", "2048"))
+MAX_CACHED_MATCHES = 4096     # larger match sets are not kept (sessions do not store them either)
+PREWARM_QUERIES = 1000        # most frequent logged queries run by prewarm()
+
+class RecommendCache:
+    """Bounded LRU of search_rows() results for the catalog it last saw.
+
+    A different Catalog (a reload, even a price-only patch) empties it.
+    """
+
+    def __init__(self, maxsize: int = RECOMMEND_CACHE_SIZE):
+        self.matches = LRUCache(maxsize)      # filter key -> matching row ids
+        self.results = LRUCache(maxsize)      # filter key + ranking -> (matches or None, top rows)
+        self._catalog = None
+        self._lock = threading.Lock()
+
+    def _use(self, catalog):
+        if catalog is not self._catalog:
+            with self._lock:
+                if catalog is not self._catalog:
+                    self.matches.clear()
+                    self.results.clear()
+                    self._catalog = catalog
+
+    def search(self, catalog, params: dict, k=5, rank_by=None):
+        """search_rows(catalog.index, params, k, rank_by), memoized.
+
+        The returned arrays are shared and read-only; matches is None when
+        more than MAX_CACHED_MATCHES rows matched.
+        """
+        self._use(catalog)
+        index = catalog.index
+        filter_key = (catalog.version, index.filter_key(**params))
+        ranking = {name: params.get(name) for name in RANKING_PARAMS}
+        result_key = (filter_key, k, rank_by, index.ranking_key(rank_by, **ranking))
+        cached = self.results.get(result_key)
+        if cached is not None:
+            return cached
+
+        matches = self.matches.get(filter_key)
+        if matches is None:
+            matches = index.filter_rows(**params)
+            matches.setflags(write=False)
+            if len(matches) <= MAX_CACHED_MATCHES:
+                self.matches.put(filter_key, matches)
+        rows = index.top_k(matches, k, rank_by=rank_by, **ranking)
+        rows.setflags(write=False)
+        cached = (matches if len(matches) <= MAX_CACHED_MATCHES else None, rows)
+        if catalog is self._catalog:
+            self.results.put(result_key, cached)
+        return cached
+
+    def prewarm(self, catalog, queries, k=5, rank_by=None, limit: int = PREWARM_QUERIES) -> int:
+        """Run the `limit` most frequent of `queries` (params dicts) into the cache; returns how many"""
+        counts = Counter(json.dumps(params, sort_keys=True) for params in queries)
+        warmed = 0
+        for text, _ in counts.most_common(min(limit, self.results.maxsize)):
+            try:
+                self.search(catalog, json.loads(text), k, rank_by)
+            except (TypeError, ValueError, re.error):
+                continue   # a malformed log line
+            warmed += 1
+        return warmed
+
+    def stats(self) -> dict:
+        return {"version": getattr(self._catalog, "version", None),
+                "matches": self.matches.stats(), "results": self.results.stats()}
+
+def read_query_log(path):
+    """Params dicts from a JSONL query log, one {"usage": ..., "budget": ...} object per line"""
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                params = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(params, dict):
+                queries.append({name: value for name, value in params.items() if name in PARAM_NAMES})
+    return queries
 
-    # USAGE FILTER
-    if usage == "gaming":
-        results = results[results["GPU"].notna()]
-        results = results[results["RAM"] >= 8]
+INDEX_CACHE_SIZE = 4          # DataFrames recommend() keeps a CatalogIndex for (and so keeps alive)
+_indexes = OrderedDict()      # id(df) -> (shape and columns, CatalogIndex)
+_indexes_lock = threading.Lock()
 
-    elif usage == "coding":
-        results = results[results["CPU"].str.contains("i5|i7|Ryzen", case=False, na=False)]
-        results = results[results["RAM"] >= 8]
+def catalog_index(df: pd.DataFrame) -> CatalogIndex:
+    """CatalogIndex of `df`, built on the first call for that DataFrame object and reused after.
 
-    elif usage == "editing":
-        results = results[results["RAM"] >= 16]
-        
+    Keyed by identity (plus shape and columns): after editing values in
+    place, pass a copy or a fresh CatalogIndex(df) instead.
+    """
+    key, stamp = id(df), (df.shape, tuple(df.columns))
+    with _indexes_lock:
+        cached = _indexes.get(key)
+        if cached is not None and cached[1].df is df and cached[0] == stamp:
+            _indexes.move_to_end(key)
+            return cached[1]
+    index = CatalogIndex(df)
+    with _indexes_lock:
+        _indexes[key] = (stamp, index)
+        _indexes.move_to_end(key)
+        while len(_indexes) > INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
 
-    # BUDGET
-    if budget:
-        budget_usd = budget / 16000
-        results = results[results["Final Price"] <= budget_usd]
+def recommend(df, usage=None, budget=None, brand=None, screen_size=None, preference=None, ram=None, storage=None, touchscreen=None, k=5, rank_by=None):
+    """Return up to `k` matching laptops; `df` may be a DataFrame, a prebuilt CatalogIndex
+    or a PartitionedCatalog (app.partition_store) for catalogs larger than memory.
 
-    return results[["Brand", "Model", "GPU", "CPU", "RAM", "Storage", "Screen", "Touch", "Final Price"]].head(5)
+    rank_by=None keeps catalog order, "score" ranks by the usage-weighted
+    score and "price" returns the cheapest matches first.
+    """
+    if not isinstance(df, (pd.DataFrame, CatalogIndex)):
+        return df.recommend(
+            usage=usage, budget=budget, brand=brand, screen_size=screen_size, preference=preference,
+            ram=ram, storage=storage, touchscreen=touchscreen, k=k, rank_by=rank_by,
+        )
+    index = df if isinstance(df, CatalogIndex) else catalog_index(df)
+    rows = recommend_rows(
+        index, usage=usage, budget=budget, brand=brand, screen_size=screen_size,
+        preference=preference, ram=ram, storage=storage, touchscreen=touchscreen,
+        k=k, rank_by=rank_by,
+    )
+    return index.take(rows)
 
 # For testing only
 if __name__ == "__main__":
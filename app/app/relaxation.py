@@ -0,0 +1,129 @@
+import math
+
+import numpy as np
+
+from app.recommender import IDR_PER_USD
+
+# ==========================================
+# CONSTRAINT RELAXATION
+# ==========================================
+# When a search matches nothing, find the smallest sets of criteria whose
+# relaxation does give results. Each criterion's mask is computed once; a
+# row's failure signature is the bitmask of the criteria it fails, and
+# counting rows per signature (bincount) followed by a subset-sum transform
+# gives, for every set S of relaxed criteria at once, how many rows fail
+# only criteria in S. No filter is re-run per candidate set.
+#
+# Range criteria (budget, RAM, storage, screen size) are then relaxed only as
+# far as needed ("budget Rp 17.100.000") instead of being dropped.
+
+MAX_SUGGESTIONS = 3
+BUDGET_STEP_IDR = 100_000     # a raised budget is rounded up to this
+
+class Relaxation:
+    """Criteria to change and how many laptops match once they are.
+
+    `changes` maps each relaxed criterion to its new value (None = dropped);
+    `params` are the search params with the changes applied.
+    """
+    __slots__ = ("changes", "params", "count")
+
+    def __init__(self, changes, params, count):
+        self.changes = changes
+        self.params = params
+        self.count = count
+
+    def __repr__(self):
+        return f"Relaxation({self.changes!r}, count={self.count})"
+
+def subset_counts(signatures, criteria: int) -> np.ndarray:
+    """counts[S] = rows whose failure signature is a subset of S, for every bitmask S"""
+    counts = np.bincount(signatures, minlength=1 << criteria).astype(np.int64)
+    for bit in range(criteria):
+        view = counts.reshape(-1, 2, 1 << bit)
+        view[:, 1, :] += view[:, 0, :]
+    return counts
+
+def minimal_sets(counts, criteria: int):
+    """Bitmasks S with matches whose every proper subset has none, fewest criteria first"""
+    found = []
+    for subset in range(1, 1 << criteria):
+        # Counts only grow with S, so checking the subsets one bit smaller is enough
+        if counts[subset] and all(not counts[subset & ~(1 << bit)] for bit in range(criteria) if subset >> bit & 1):
+            found.append(subset)
+    found.sort(key=lambda subset: (bin(subset).count("1"), -counts[subset]))
+    return found
+
+def _loosen(index, name, requested, rows):
+    """(new value, rows still matching) relaxing range criterion `name` just enough for `rows`"""
+    if name == "budget":
+        price = index.price[rows]
+        if np.isnan(price).all():
+            return None, rows
+        needed = float(np.nanmin(price)) * IDR_PER_USD
+        budget = math.ceil(needed / BUDGET_STEP_IDR) * BUDGET_STEP_IDR
+        return budget, rows[price <= budget / IDR_PER_USD]
+    if name in ("ram", "storage"):
+        values = getattr(index, name)[rows]
+        if np.isnan(values).all() or np.nanmax(values) <= 0:
+            return None, rows
+        best = float(np.nanmax(values))
+        value = int(best) if best.is_integer() else best
+        return value, rows[values >= value]
+    # screen_size: the available size nearest to the one asked for
+    screen = index.screen[rows]
+    if np.isnan(screen).all():
+        return None, rows
+    size = float(screen[np.nanargmin(np.abs(screen - float(requested)))])
+    return size, rows[(screen >= size - 0.3) & (screen <= size + 0.3)]
+
+def relax(index, params: dict, limit: int = MAX_SUGGESTIONS) -> list:
+    """Up to `limit` minimal Relaxations of `params` that match at least one laptop of a CatalogIndex.
+
+    Returns [] when `params` already match (or nothing could match).
+    """
+    masks = index.criterion_masks(**params)
+    names = list(masks)
+    if not names:
+        return []
+    signatures = np.zeros(index.size, dtype=np.int64)
+    for bit, name in enumerate(names):
+        signatures |= (~masks[name]).astype(np.int64) << bit
+    counts = subset_counts(signatures, len(names))
+    if counts[0]:
+        return []
+
+    relaxations = []
+    for subset in minimal_sets(counts, len(names))[:limit]:
+        relaxed = [name for bit, name in enumerate(names) if subset >> bit & 1]
+        rows = np.flatnonzero((signatures & ~subset) == 0)
+        changes = {}
+        for name in relaxed:
+            if name in ("budget", "ram", "storage", "screen_size"):
+                changes[name], rows = _loosen(index, name, params[name], rows)
+            else:
+                changes[name] = None
+        relaxations.append(Relaxation(changes, {**params, **changes}, len(rows)))
+    return relaxations
+
+def describe(relaxation: Relaxation, params: dict) -> str:
+    """One suggestion line, e.g. "budget dinaikkan ke Rp 17.100.000 + tanpa filter brand asus (3 laptop)" """
+    parts = []
+    for name, value in relaxation.changes.items():
+        old = params.get(name)
+        if name == "budget":
+            parts.append(f"budget dinaikkan ke Rp {value:,.0f}".replace(",", ".") if value else "tanpa batas budget")
+        elif name in ("ram", "storage"):
+            label = "RAM" if name == "ram" else "storage"
+            parts.append(f"{label} diturunkan ke {value}GB" if value else f"tanpa minimal {label}")
+        elif name == "screen_size":
+            parts.append(f"layar {value:g} inch" if value else "ukuran layar bebas")
+        elif name == "brand":
+            parts.append(f"tanpa filter brand {old}")
+        elif name == "usage":
+            parts.append(f"tanpa syarat untuk {old}")
+        elif name == "preference":
+            parts.append(f"tanpa preferensi layar {old}")
+        elif name == "touchscreen":
+            parts.append("tanpa syarat touchscreen" if old else "boleh touchscreen")
+    return f"{' + '.join(parts)} ({relaxation.count} laptop)"
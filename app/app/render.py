@@ -0,0 +1,162 @@
+import copy
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# PRECOMPUTED DISPLAY STRINGS
+# ==========================================
+# Every catalog row's display cells, spec sheet, price line and JSON record
+# are built once when the catalog loads; a reply only joins the fragments of
+# its few rows. "table" output is identical to the pandas table of the
+# result rows with Final Price shown in IDR (tests/test_render.py checks it).
+
+FORMATS = ("table", "text", "json")
+PRICE_COLUMN = "Final Price"
+PRICE_IDR_HEADER = "Final Price (IDR)"
+FLOAT_PRECISION = 6           # pandas display.precision
+
+def format_idr(usd_price, idr_per_usd=16000):
+    """Format harga USD ke Rupiah"""
+    idr_price = usd_price * idr_per_usd
+    return f"Rp {idr_price:,.0f}".replace(",", ".")
+
+def _cell(value):
+    return "NaN" if _isna(value) else str(value)
+
+def _isna(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+def _decimals(value):
+    """Decimals pandas needs to show `value` (at least 1, at most FLOAT_PRECISION)"""
+    if math.isnan(value):
+        return 0
+    fraction = f"{value:.{FLOAT_PRECISION}f}".split(".")[1].rstrip("0")
+    return max(1, len(fraction))
+
+def _spec(r, idr):
+    return (
+        f"Spesifikasi {r['Brand']} {r['Model']}:\n"
+        f"   • CPU: {r['CPU']}\n"
+        f"   • RAM: {r['RAM']}GB | Storage: {r['Storage']}GB\n"
+        f"   • GPU: {r['GPU']}\n"
+        f"   • Screen: {r['Screen']}\" | Touch: {r['Touch']}\n"
+        f"   • Harga: {idr}"
+    )
+
+def _price_line(r, idr):
+    return f"Harga {r['Brand']} {r['Model']} sekitar {idr}."
+
+def _line(r, idr):
+    return (
+        f"{r['Brand']} {r['Model']} | {r['CPU']} | RAM {r['RAM']}GB | {r['Storage']}GB | "
+        f"{r['Screen']}\" | GPU {r['GPU'] if not _isna(r['GPU']) else '-'} | {idr}"
+    )
+
+def _record(row_id, r, idr, idr_per_usd):
+    return {
+        "row": row_id,
+        **{name.lower().replace(" ", "_"): (None if _isna(value) else value) for name, value in r.items()},
+        "price_idr": round(r[PRICE_COLUMN] * idr_per_usd) if not _isna(r[PRICE_COLUMN]) else None,
+        "price_idr_text": idr,
+    }
+
+class Reply(str):
+    """Reply text; `results` holds JSON-ready records of the listed laptops, if any"""
+    results = None
+
+class CatalogDisplay:
+    """Display fragments for every row of a catalog DataFrame"""
+
+    def __init__(self, df: pd.DataFrame, columns, idr_per_usd: int = 16000):
+        self.source_columns = list(columns)
+        self.idr_per_usd = idr_per_usd
+        self.columns = [c for c in columns if c != PRICE_COLUMN] + [PRICE_IDR_HEADER]
+        values = {name: df[name].tolist() for name in columns}
+        prices = values[PRICE_COLUMN]
+        price_idr = [format_idr(p, idr_per_usd) for p in prices]
+
+        # Table cells; float columns keep per-row decimals because pandas pads a
+        # column to the widest precision among the rows being shown. Numeric
+        # cells and headers carry pandas' leading sign space.
+        self.cells = {}
+        self.float_columns = {}
+        self.headers = {}
+        for name in self.columns[:-1]:
+            dtype = df[name].dtype
+            if pd.api.types.is_float_dtype(dtype):
+                floats = np.asarray(values[name], dtype=float)
+                self.float_columns[name] = (floats, np.array([_decimals(v) for v in floats], dtype=np.int8))
+                self.headers[name] = " " + name
+            elif pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+                self.cells[name] = [" " + _cell(v) for v in values[name]]
+                self.headers[name] = " " + name
+            else:
+                self.cells[name] = [_cell(v) for v in values[name]]
+                self.headers[name] = name
+        self.headers[PRICE_IDR_HEADER] = PRICE_IDR_HEADER
+        self.cells[PRICE_IDR_HEADER] = price_idr
+
+        rows = [dict(zip(columns, row)) for row in zip(*(values[name] for name in columns))]
+        self.specs = [_spec(r, idr) for r, idr in zip(rows, price_idr)]
+        self.price_lines = [_price_line(r, idr) for r, idr in zip(rows, price_idr)]
+        self.lines = [_line(r, idr) for r, idr in zip(rows, price_idr)]
+        self.records = [_record(row_id, r, idr, idr_per_usd) for row_id, (r, idr) in enumerate(zip(rows, price_idr))]
+
+    def updated(self, df: pd.DataFrame, rows) -> "CatalogDisplay":
+        """Copy for `df` with the fragments of `rows` rebuilt, for changes that keep
+        every table column but the price as it was (a price or stock update)
+        """
+        display = copy.copy(self)
+        display.cells = dict(self.cells)
+        price_idr = display.cells[PRICE_IDR_HEADER] = list(self.cells[PRICE_IDR_HEADER])
+        display.specs, display.price_lines = list(self.specs), list(self.price_lines)
+        display.lines, display.records = list(self.lines), list(self.records)
+
+        rows = [int(row) for row in rows]
+        values = {name: df[name].iloc[rows].tolist() for name in self.source_columns}
+        for i, row in enumerate(rows):
+            r = {name: values[name][i] for name in self.source_columns}
+            idr = price_idr[row] = format_idr(r[PRICE_COLUMN], self.idr_per_usd)
+            display.specs[row] = _spec(r, idr)
+            display.price_lines[row] = _price_line(r, idr)
+            display.lines[row] = _line(r, idr)
+            display.records[row] = _record(row, r, idr, self.idr_per_usd)
+        return display
+
+    def _column(self, name, rows):
+        if name in self.float_columns:
+            floats, decimals = self.float_columns[name]
+            shown = floats[rows]
+            places = int(decimals[rows].max()) if len(rows) else 1
+            return [" NaN" if math.isnan(v) else f" {v:.{places}f}" for v in shown]
+        cells = self.cells[name]
+        return [cells[row] for row in rows]
+
+    def table(self, rows) -> str:
+        """Right-aligned table, same text as DataFrame.to_string(index=False) of the rows"""
+        columns = []
+        for name in self.columns:
+            header = self.headers[name]
+            cells = self._column(name, rows)
+            width = max(len(header), *(len(c) for c in cells)) if cells else len(header)
+            columns.append([header.rjust(width)] + [c.rjust(width) for c in cells])
+        return "\n".join(" ".join(line) for line in zip(*columns))
+
+    def text(self, rows) -> str:
+        """One numbered line per laptop"""
+        return "\n".join(f"{i}. {self.lines[row]}" for i, row in enumerate(rows, 1))
+
+    def json(self, rows) -> str:
+        return json.dumps([self.records[row] for row in rows], ensure_ascii=False)
+
+    def render(self, rows, fmt: str = "table") -> str:
+        """Rows in one of FORMATS"""
+        rows = [int(row) for row in rows]
+        if fmt == "json":
+            return self.json(rows)
+        if fmt == "text":
+            return self.text(rows)
+        return self.table(rows)
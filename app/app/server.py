@@ -0,0 +1,216 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from app import chatbot, hot_reload, nlp_pipeline, tracing
+from app.render import FORMATS
+from app.session import SessionStore
+
+HOST = os.environ.get("HOST", "0.0.0.0")
+PORT = int(os.environ.get("PORT", "5000"))
+WORKERS = int(os.environ.get("CHAT_WORKERS", str(min(8, os.cpu_count() or 1))))
+MAX_PENDING = int(os.environ.get("CHAT_MAX_PENDING", "64"))       # queued + running replies
+REQUEST_TIMEOUT = float(os.environ.get("CHAT_TIMEOUT", "10"))      # seconds per reply
+READ_TIMEOUT = 15.0                                                # seconds to receive a request
+MAX_BODY = 64 * 1024
+SESSION_TTL = float(os.environ.get("SESSION_TTL", "3600"))          # seconds idle before a session expires
+MAX_SESSIONS = int(os.environ.get("MAX_SESSIONS", "10000"))
+SESSION_MAX_BYTES = int(os.environ.get("SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+SESSION_SPILL_PATH = os.environ.get("SESSION_SPILL_PATH")          # SQLite file for idle sessions
+SESSION_LOCK_STRIPES = 256
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# HTTP SERVER
+# ==========================================
+class ChatServer:
+    """asyncio HTTP front end for chatbot_reply with one memory per session.
+
+    Replies run on a bounded thread pool so the event loop never blocks.
+    Requests beyond MAX_PENDING are refused with 503 and replies slower than
+    REQUEST_TIMEOUT get 504; a timed-out reply still counts as pending and
+    holds its session until its thread finishes. Turns of one session are
+    serialized.
+
+    With `session_path` the sessions live in that SQLite file instead of
+    process memory, so several server processes can share them.
+
+    POST /chat    {"message": "...", "session_id": "...", "format": "table|text|json"}
+                  -> {"reply": "...", "session_id": "..."} (+ "results": [...] with format json)
+    GET  /health  -> {"status": "ok", "ready": bool, "pending": int}
+    GET  /metrics       -> stage latency histograms and counters (Prometheus text format)
+    GET  /metrics.json  -> the same as JSON
+    """
+
+    def __init__(self, workers: int = WORKERS, max_pending: int = MAX_PENDING, timeout: float = REQUEST_TIMEOUT,
+                 session_path: str = None):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chat")
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        if session_path:
+            self.sessions = SessionStore(MAX_SESSIONS, SESSION_TTL, SESSION_MAX_BYTES, session_path, shared=True)
+        else:
+            self.sessions = SessionStore(MAX_SESSIONS, SESSION_TTL, SESSION_MAX_BYTES, SESSION_SPILL_PATH)
+        # Striped locks keep per-session ordering without a lock object per session
+        self.session_locks = [asyncio.Lock() for _ in range(SESSION_LOCK_STRIPES)]
+
+    def lock_for(self, session_id):
+        return self.session_locks[hash(session_id) % SESSION_LOCK_STRIPES]
+
+    def reply(self, message, session_id, fmt="table"):
+        memory = self.sessions.get(session_id)
+        try:
+            return chatbot.chatbot_reply(message, memory, fmt)
+        finally:
+            self.sessions.save(session_id)
+
+    def _reply_done(self, future, lock):
+        lock.release()
+        self.pending -= 1
+        # Logged here rather than in chat() so a reply failing after its 504 is logged too
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("chatbot_reply failed: %r", future.exception(), exc_info=future.exception())
+
+    async def chat(self, payload):
+        message = payload.get("message")
+        if not isinstance(message, str) or not message.strip():
+            return HTTPStatus.BAD_REQUEST, {"error": "field 'message' is required"}
+        fmt = payload.get("format", "table")
+        if fmt not in FORMATS:
+            return HTTPStatus.BAD_REQUEST, {"error": f"field 'format' must be one of {', '.join(FORMATS)}"}
+        if self.pending >= self.max_pending:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "server busy, retry later"}
+
+        session_id = str(payload.get("session_id") or uuid.uuid4().hex)
+
+        # The pending slot and the session lock are held until the reply thread finishes,
+        # even after a 504: it keeps using the session's memory until then
+        self.pending += 1
+        lock = self.lock_for(session_id)
+        try:
+            await lock.acquire()
+        except BaseException:
+            self.pending -= 1
+            raise
+        future = asyncio.get_running_loop().run_in_executor(self.executor, self.reply, message, session_id, fmt)
+        future.add_done_callback(lambda done: self._reply_done(done, lock))
+        try:
+            reply = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            return HTTPStatus.GATEWAY_TIMEOUT, {"error": "reply timed out", "session_id": session_id}
+        except Exception:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error", "session_id": session_id}
+        response = {"reply": str(reply), "session_id": session_id}
+        if fmt == "json":
+            response["results"] = getattr(reply, "results", None) or []
+        return HTTPStatus.OK, response
+
+    async def route(self, method, path, body):
+        if method == "GET" and path == "/health":
+            return HTTPStatus.OK, {"status": "ok", "ready": nlp_pipeline.is_ready(), "pending": self.pending,
+                                   "sessions": self.sessions.stats()}
+        if method == "GET" and path == "/metrics":
+            return HTTPStatus.OK, tracing.metrics.prometheus()
+        if method == "GET" and path == "/metrics.json":
+            return HTTPStatus.OK, {**tracing.metrics.snapshot(), "cache": chatbot.analysis_cache_stats()}
+        if path == "/chat":
+            if method != "POST":
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use POST"}
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                return HTTPStatus.BAD_REQUEST, {"error": "body must be JSON"}
+            if not isinstance(payload, dict):
+                return HTTPStatus.BAD_REQUEST, {"error": "body must be a JSON object"}
+            return await self.chat(payload)
+        return HTTPStatus.NOT_FOUND, {"error": "not found"}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(_read_request(reader), READ_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+                method, path, headers, body, error = request
+                if error:
+                    status, payload = error, {"error": error.phrase}
+                else:
+                    status, payload = await self.route(method, path, body)
+
+                keep_alive = headers.get("connection", "").lower() != "close" and not error
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = HOST, port: int = PORT, sock=None):
+        if sock is not None:
+            server = await asyncio.start_server(self.handle, sock=sock)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        print(f"🤖 Laptop Recommender API di http://{host}:{port} (POST /chat, pid {os.getpid()})")
+        async with server:
+            await server.serve_forever()
+
+async def _read_request(reader):
+    """(method, path, headers, body, error_status) of the next request, or None on EOF"""
+    line = await reader.readline()
+    if not line:
+        return None
+    parts = line.decode("latin-1").split()
+    if len(parts) != 3:
+        return None, None, {}, b"", HTTPStatus.BAD_REQUEST
+    method, path, _ = parts
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        return method, path, headers, b"", HTTPStatus.BAD_REQUEST
+    if length > MAX_BODY:
+        return method, path, headers, b"", HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+    body = await reader.readexactly(length) if length else b""
+    return method, path.split("?", 1)[0], headers, body, None
+
+def _response(status, payload, keep_alive):
+    """HTTP response bytes; a str payload is sent as plain text, anything else as JSON"""
+    if isinstance(payload, str):
+        body = payload.encode("utf-8")
+        content_type = "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        content_type = "application/json; charset=utf-8"
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+    )
+    if status == HTTPStatus.SERVICE_UNAVAILABLE:
+        head += "Retry-After: 1\r\n"
+    return (head + "\r\n").encode("latin-1") + body
+
+def run(host: str = HOST, port: int = PORT):
+    """Warm up in the background, start NER micro-batching and hot reload, and serve forever"""
+    chatbot.warmup(background=True)
+    nlp_pipeline.get_micro_batcher()
+    hot_reload.start()
+    asyncio.run(ChatServer().serve(host, port))
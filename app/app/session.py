@@ -0,0 +1,229 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+# Larger match sets are not kept; refining them falls back to a full scan
+MAX_STORED_CANDIDATES = 4096
+
+PARAM_FIELDS = ("usage", "budget", "brand", "screen_size", "preference", "ram", "storage", "touchscreen")
+
+# ==========================================
+# SESSION STATE
+# ==========================================
+class Params:
+    """Slotted record of recommendation params; unset fields are None"""
+    __slots__ = PARAM_FIELDS
+
+    def __init__(self, **params):
+        for field in PARAM_FIELDS:
+            setattr(self, field, params.get(field))
+
+    @classmethod
+    def from_dict(cls, params: Optional[dict]) -> "Params":
+        return cls(**(params or {}))
+
+    def to_dict(self) -> dict:
+        """Only the fields that are set, ready for recommend(**params)"""
+        return {field: getattr(self, field) for field in PARAM_FIELDS if getattr(self, field) is not None}
+
+    def __bool__(self):
+        return any(getattr(self, field) is not None for field in PARAM_FIELDS)
+
+    def __contains__(self, field):
+        return getattr(self, field, None) is not None
+
+    def __getitem__(self, field):
+        return getattr(self, field)
+
+    def __eq__(self, other):
+        return isinstance(other, Params) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"Params({self.to_dict()})"
+
+class SessionState:
+    """Compact per-conversation state: the last query, its params and result row ids.
+
+    `candidates` holds every row that matched (not just the ones shown) so a
+    follow-up turn can narrow them down; it is None when there were more than
+    MAX_STORED_CANDIDATES. Row ids refer to the catalog `catalog_version`.
+    """
+    __slots__ = ("last_query", "last_rows", "last_params", "candidates", "updated_at", "catalog_version")
+
+    def __init__(self, last_query=None, last_rows=None, last_params=None, candidates=None, updated_at=None,
+                 catalog_version=None):
+        self.last_query = last_query
+        self.last_rows = last_rows
+        self.last_params = last_params if last_params is not None else Params()
+        self.candidates = candidates
+        self.updated_at = updated_at if updated_at is not None else time.time()
+        self.catalog_version = catalog_version
+
+    def remember(self, query: str, rows, params: dict, candidates=None, catalog_version=None):
+        self.last_query = query
+        self.catalog_version = catalog_version
+        self.last_rows = np.asarray(rows, dtype=np.int32)
+        self.last_params = Params.from_dict(params)
+        if candidates is not None and len(candidates) <= MAX_STORED_CANDIDATES:
+            self.candidates = np.asarray(candidates, dtype=np.int32)
+        else:
+            self.candidates = None
+        self.updated_at = time.time()
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by this session"""
+        size = 200 + len(self.last_query or "")
+        for rows in (self.last_rows, self.candidates):
+            if rows is not None:
+                size += rows.nbytes
+        return size
+
+# ==========================================
+# SESSION STORE
+# ==========================================
+class SessionStore:
+    """Bounded session store with LRU + TTL eviction and an optional SQLite spill.
+
+    Sessions idle longer than `ttl` seconds are dropped. Beyond `max_sessions`
+    or `max_bytes` the least recently used sessions are evicted, to the SQLite
+    file at `spill_path` when one is given (and loaded back on their next turn),
+    otherwise discarded.
+
+    With `shared=True` the SQLite file is the store itself: every turn reads
+    the session from it and writes it back, so several worker processes can
+    serve the same sessions.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl: float = 3600, max_bytes: int = 64 * 1024 * 1024,
+                 spill_path: Optional[str] = None, shared: bool = False):
+        if shared and not spill_path:
+            raise ValueError("a shared SessionStore needs a spill_path")
+        self.shared = shared
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sessions = OrderedDict()   # session id -> (state, bytes accounted for it)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.spills = 0
+
+        self._db = None
+        if spill_path:
+            self._db = sqlite3.connect(spill_path, timeout=5, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, query TEXT, params TEXT, rows BLOB, candidates BLOB, updated_at REAL, "
+                "catalog_version TEXT)"
+            )
+            # Spill files written before catalog_version existed
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(sessions)")}
+            if "catalog_version" not in columns:
+                self._db.execute("ALTER TABLE sessions ADD COLUMN catalog_version TEXT")
+            self._db.commit()
+
+    def get(self, session_id: str) -> SessionState:
+        """The session's state, created (or restored from the spill) if needed"""
+        now = time.time()
+        if self.shared:
+            with self._lock:
+                state = self._load(session_id, now, delete=False) or SessionState()
+                state.updated_at = now
+                self._sessions[session_id] = (state, state.nbytes)
+                return state
+
+        with self._lock:
+            state, size = self._sessions.pop(session_id, (None, 0))
+            self._bytes -= size
+            if state is not None and now - state.updated_at > self.ttl:
+                state = None
+            if state is None:
+                state = self._load(session_id, now, delete=True) or SessionState()
+            state.updated_at = now
+            self._sessions[session_id] = (state, state.nbytes)
+            self._bytes += state.nbytes
+            self._evict(now)
+            return state
+
+    def save(self, session_id: str):
+        """Re-account (or, when shared, write back) a session after its turn changed its state"""
+        if self.shared:
+            with self._lock:
+                state, _ = self._sessions.pop(session_id, (None, 0))
+                if state is not None:
+                    self._write(session_id, state)
+            return
+
+        with self._lock:
+            item = self._sessions.get(session_id)
+            if item is None:
+                return
+            state, size = item
+            self._sessions[session_id] = (state, state.nbytes)
+            self._bytes += state.nbytes - size
+            self._evict(time.time())
+
+    def _evict(self, now):
+        # Expired sessions first, then least recently used ones over the caps
+        while self._sessions:
+            session_id, (state, size) = next(iter(self._sessions.items()))
+            expired = now - state.updated_at > self.ttl
+            over = len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes
+            if not (expired or over) or (len(self._sessions) == 1 and not expired):
+                break
+            del self._sessions[session_id]
+            self._bytes -= size
+            self.evictions += 1
+            if not expired and self._db is not None:
+                self._write(session_id, state)
+                self.spills += 1
+
+    def _write(self, session_id, state):
+        rows = state.last_rows.tobytes() if state.last_rows is not None else None
+        candidates = state.candidates.tobytes() if state.candidates is not None else None
+        self._db.execute(
+            "INSERT OR REPLACE INTO sessions (id, query, params, rows, candidates, updated_at, catalog_version) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (session_id, state.last_query, json.dumps(state.last_params.to_dict()), rows, candidates, state.updated_at,
+             state.catalog_version),
+        )
+        self._db.commit()
+
+    def _load(self, session_id, now, delete):
+        if self._db is None:
+            return None
+        record = self._db.execute(
+            "SELECT query, params, rows, candidates, updated_at, catalog_version FROM sessions WHERE id = ?",
+            (session_id,)
+        ).fetchone()
+        if record is None:
+            return None
+        if delete:
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            self._db.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl,))
+            self._db.commit()
+        query, params, rows, candidates, updated_at, catalog_version = record
+        if now - updated_at > self.ttl:
+            return None
+        last_rows = np.frombuffer(rows, dtype=np.int32).copy() if rows is not None else None
+        candidates = np.frombuffer(candidates, dtype=np.int32).copy() if candidates is not None else None
+        return SessionState(query, last_rows, Params.from_dict(json.loads(params)), candidates, updated_at,
+                            catalog_version)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "bytes": self._bytes,
+            "evictions": self.evictions,
+            "spills": self.spills,
+        }
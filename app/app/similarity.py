@@ -0,0 +1,159 @@
+import copy
+import re
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# SIMILAR LAPTOPS
+# ==========================================
+# Every catalog row becomes a small weighted feature vector (RAM, storage,
+# screen, price, CPU tier, GPU presence and tier, touch), each feature scaled
+# to [0, 1] over the catalog. "Laptop mirip X" is then a nearest-neighbour
+# query: squared distances to all candidate rows come from one float32
+# matrix-vector product, and a partial selection picks the closest. Budget or
+# brand filters just narrow the candidate rows first, which a tree index
+# could not do without rebuilding.
+
+# (pattern, tier) tried in order; the first match wins
+CPU_TIERS = (
+    (re.compile(r"\bi9\b|ryzen 9|apple m\d (?:pro|max)", re.IGNORECASE), 5),
+    (re.compile(r"\bi7\b|ryzen 7|apple m\d\b", re.IGNORECASE), 4),
+    (re.compile(r"\bi5\b|ryzen 5|snapdragon 8", re.IGNORECASE), 3),
+    (re.compile(r"\bi3\b|ryzen 3|core m3|snapdragon|microsoft sq|radeon", re.IGNORECASE), 2),
+    (re.compile(r"celeron|pentium|athlon|\b30\d\dc?e\b|mediatek", re.IGNORECASE), 1),
+)
+DEFAULT_CPU_TIER = 2
+GPU_TIERS = (
+    (re.compile(r"rtx\s*(?:40[89]0|a5\d{3})", re.IGNORECASE), 5),
+    (re.compile(r"rtx\s*(?:20[78]0|30[78]0|4070|a[34]\d{3}|3000)|rx\s*6[78]\d{2}", re.IGNORECASE), 4),
+    (re.compile(r"rtx\s*(?:2060|3060|40[56]0|a2000)|gtx\s*1070|rx\s*(?:66|7[67])\d{2}|pro\s*5500|t\s*2000", re.IGNORECASE), 3),
+    (re.compile(r"gtx|rtx|rx|radeon|t\s*1\d00|a\s*730", re.IGNORECASE), 2),
+)
+DEFAULT_GPU_TIER = 1          # any other dedicated GPU (MX, T 500, ...)
+
+FEATURES = ("ram", "storage", "screen", "price", "cpu", "gpu", "gpu_tier", "touch")
+# Relative importance in the distance; price and performance tiers dominate
+FEATURE_WEIGHTS = {"ram": 1.0, "storage": 0.6, "screen": 0.8, "price": 1.5, "cpu": 1.2, "gpu": 0.8, "gpu_tier": 1.0, "touch": 0.4}
+SELECT_FACTOR = 4             # candidates kept per requested result before skipping repeated models
+
+def cpu_tier(cpu) -> int:
+    if not isinstance(cpu, str):
+        return DEFAULT_CPU_TIER
+    return next((tier for pattern, tier in CPU_TIERS if pattern.search(cpu)), DEFAULT_CPU_TIER)
+
+def gpu_tier(gpu) -> int:
+    """0 without a dedicated GPU, else 1 (entry) to 5 (flagship)"""
+    if not isinstance(gpu, str) or not gpu.strip():
+        return 0
+    return next((tier for pattern, tier in GPU_TIERS if pattern.search(gpu)), DEFAULT_GPU_TIER)
+
+def _tiers(values, tier):
+    """tier(value) per row, calling `tier` once per distinct value"""
+    codes, uniques = pd.factorize(values)
+    tiers = np.array([tier(value) for value in uniques] + [tier(None)], dtype=float)
+    return tiers[codes]       # code -1 (missing) picks tier(None)
+
+def _scaled(values):
+    """`values` min-max scaled to [0, 1]; NaN becomes the column median"""
+    values = np.asarray(values, dtype=float)
+    finite = values[~np.isnan(values)]
+    if not len(finite):
+        return np.zeros(len(values))
+    values = np.where(np.isnan(values), np.median(finite), values)
+    low, high = finite.min(), finite.max()
+    return (values - low) / (high - low) if high > low else np.zeros(len(values))
+
+def _log_scaled(values):
+    values = np.asarray(values, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return _scaled(np.where(values > 0, np.log2(values), np.nan))
+
+class SimilarityIndex:
+    """Weighted feature vectors of every catalog row, for k-nearest-neighbour queries"""
+
+    def __init__(self, df: pd.DataFrame):
+        columns = {
+            "ram": _log_scaled(df["RAM"]),
+            "storage": _log_scaled(df["Storage"]),
+            "screen": _scaled(df["Screen"]),
+            "price": _log_scaled(df["Final Price"]),
+            "cpu": (_tiers(df["CPU"], cpu_tier) - 1) / 4,
+            "gpu": df["GPU"].notna().to_numpy(dtype=float),
+            "gpu_tier": _tiers(df["GPU"], gpu_tier) / 5,
+            "touch": (df["Touch"].astype(str).str.lower() == "yes").to_numpy(dtype=float),
+        }
+        self.weights = np.sqrt(np.array([FEATURE_WEIGHTS[name] for name in FEATURES]))
+        self.vectors = np.ascontiguousarray(np.column_stack([columns[name] for name in FEATURES]) * self.weights,
+                                            dtype=np.float32)
+        self.norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+        # Rows of one Brand + Model are variants of the same laptop, not alternatives to it
+        names = df["Brand"].astype(str).str.lower() + "\0" + df["Model"].astype(str).str.lower()
+        self.model_codes = pd.factorize(names)[0]
+        self.model_order = np.argsort(self.model_codes, kind="stable")   # rows grouped by model, row id order within
+
+    def with_prices(self, price) -> "SimilarityIndex":
+        """Copy with the price feature recomputed from a new `price` column"""
+        index = copy.copy(self)
+        vectors = self.vectors.copy()
+        column = FEATURES.index("price")
+        vectors[:, column] = _log_scaled(price) * self.weights[column]
+        index.vectors = vectors
+        index.norms = np.einsum("ij,ij->i", vectors, vectors)
+        return index
+
+    def distances(self, row: int, rows=None):
+        """Squared weighted distances from `row` to `rows` (default every row)"""
+        vectors, norms = (self.vectors, self.norms) if rows is None else (self.vectors[rows], self.norms[rows])
+        query = self.vectors[row]
+        return np.maximum(norms - 2 * (vectors @ query) + self.norms[row], 0)
+
+    def nearest(self, row: int, k: int = 5, rows=None):
+        """Row ids of the `k` laptops closest to `row`, one per model, other variants of `row` excluded.
+
+        `rows` (row ids, e.g. a budget or brand filter) limits the
+        candidates. Ties are broken by row id.
+        """
+        if rows is None:
+            keys = self.distances(row)
+            same = self.model_codes == self.model_codes[row]
+        else:
+            rows = np.asarray(rows, dtype=np.int64)
+            keys = self.distances(row, rows)
+            same = self.model_codes[rows] == self.model_codes[row]
+        keys[same] = np.inf
+        available = len(keys) - int(np.count_nonzero(same))
+        if available <= 0 or k <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        # The closest k * SELECT_FACTOR rows usually hold k distinct models
+        keep = min(available, k * SELECT_FACTOR)
+        selected = np.flatnonzero(keys <= np.partition(keys, keep - 1)[keep - 1])
+        candidates = selected if rows is None else rows[selected]
+        candidates = candidates[np.lexsort((candidates, keys[selected]))]
+        _, first = np.unique(self.model_codes[candidates], return_index=True)
+        if len(first) >= k or keep >= available:
+            return candidates[np.sort(first)[:k]]
+        return self._nearest_models(keys, k, rows)
+
+    def _nearest_models(self, keys, k, rows=None):
+        """Closest row of each of the `k` closest models, when many rows of a few models crowd the top"""
+        if rows is None:
+            order = self.model_order
+        else:
+            order = np.argsort(self.model_codes[rows], kind="stable")
+        grouped = keys[order]
+        codes = self.model_codes[order if rows is None else rows[order]]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        best = np.minimum.reduceat(grouped, starts)
+
+        # First (lowest row id) row of each model at its minimum distance
+        ties = np.flatnonzero(grouped == np.repeat(best, np.diff(np.r_[starts, len(grouped)])))
+        groups, first = np.unique(np.searchsorted(starts, ties, side="right") - 1, return_index=True)
+        positions = order[ties[first]]
+        best_rows = positions if rows is None else rows[positions]
+        best = best[groups]
+
+        finite = np.isfinite(best)
+        best, best_rows = best[finite], best_rows[finite]
+        return best_rows[np.lexsort((best_rows, best))[:k]]
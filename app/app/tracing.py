@@ -0,0 +1,227 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+
+# ==========================================
+# STAGE TRACING AND METRICS
+# ==========================================
+# Each message runs inside message_trace(); span("ner") etc. time the stages
+# inside it. When the message finishes its spans are recorded into latency
+# histograms labelled with the message's intent. With CHAT_TRACING=0,
+# span() and message_trace() return a shared no-op context manager.
+
+TRACING = os.environ.get("CHAT_TRACING", "1") != "0"
+
+STAGES = ("normalize", "intent", "gazetteer", "ner", "params", "filter", "relax", "lookup", "similar", "format")
+
+# Histogram bucket upper bounds in seconds (Prometheus style, +Inf implied)
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+UNKNOWN_INTENT = "unknown"
+
+class Histogram:
+    """Fixed-bucket latency histogram (seconds)"""
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        """Estimate of the q-quantile, interpolated inside its bucket"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+class Metrics:
+    """Per-(stage, intent) latency histograms and per-(name, intent) counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, stage, seconds, intent=UNKNOWN_INTENT):
+        key = (stage, intent)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def record(self, spans, intent, total, error=False):
+        """All spans of one message at once, under a single lock"""
+        with self._lock:
+            for stage, seconds in (*spans, ("total", total)):
+                histogram = self.histograms.get((stage, intent))
+                if histogram is None:
+                    histogram = self.histograms[(stage, intent)] = Histogram()
+                histogram.observe(seconds)
+            self._increment("messages", intent, 1)
+            if error:
+                self._increment("errors", intent, 1)
+
+    def count(self, name, intent=UNKNOWN_INTENT, n=1):
+        with self._lock:
+            self._increment(name, intent, n)
+
+    def _increment(self, name, intent, n):
+        self.counters[(name, intent)] = self.counters.get((name, intent), 0) + n
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def snapshot(self) -> dict:
+        """JSON-ready view: {"stages": {stage: {intent: {...}}}, "counters": {name: {intent: n}}}"""
+        with self._lock:
+            histograms = {
+                key: (list(h.counts), h.count, h.sum, [h.quantile(q) for q in (0.50, 0.95, 0.99)])
+                for key, h in self.histograms.items()
+            }
+            counters = dict(self.counters)
+
+        stages = {}
+        for (stage, intent), (counts, count, total, (p50, p95, p99)) in sorted(histograms.items()):
+            stages.setdefault(stage, {})[intent] = {
+                "count": count,
+                "mean_ms": round(total / count * 1000, 4) if count else None,
+                "p50_ms": _ms(p50),
+                "p95_ms": _ms(p95),
+                "p99_ms": _ms(p99),
+                "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], counts)),
+            }
+        by_name = {}
+        for (name, intent), value in sorted(counters.items()):
+            by_name.setdefault(name, {})[intent] = value
+        return {"stages": stages, "counters": by_name}
+
+    def prometheus(self, prefix: str = "chatbot") -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            histograms = {key: (list(h.counts), h.count, h.sum) for key, h in self.histograms.items()}
+            counters = dict(self.counters)
+
+        lines = [
+            f"# HELP {prefix}_stage_seconds Latency of chatbot pipeline stages per intent.",
+            f"# TYPE {prefix}_stage_seconds histogram",
+        ]
+        for (stage, intent), (counts, count, total) in sorted(histograms.items()):
+            labels = f'stage="{stage}",intent="{intent}"'
+            cumulative = 0
+            for bound, n in zip(BUCKETS, counts):
+                cumulative += n
+                lines.append(f'{prefix}_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{prefix}_stage_seconds_sum{{{labels}}} {total:.9f}")
+            lines.append(f"{prefix}_stage_seconds_count{{{labels}}} {count}")
+
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            for (counter, intent), value in sorted(counters.items()):
+                if counter == name:
+                    lines.append(f'{prefix}_{name}_total{{intent="{intent}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+def _ms(seconds):
+    return round(seconds * 1000, 4) if seconds is not None else None
+
+metrics = Metrics()
+
+# ==========================================
+# SPANS
+# ==========================================
+_current = contextvars.ContextVar("chat_trace", default=None)
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NOOP = _NoopSpan()
+
+class _Span:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        trace = _current.get()
+        if trace is not None:
+            trace.spans.append((self.stage, elapsed))
+        else:
+            metrics.observe(self.stage, elapsed)
+        return False
+
+class MessageTrace:
+    """Spans of one message, recorded under its intent when the message finishes"""
+    __slots__ = ("spans", "intent", "start", "_token")
+
+    def __init__(self):
+        self.spans = []
+        self.intent = UNKNOWN_INTENT
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        total = time.perf_counter() - self.start
+        _current.reset(self._token)
+        metrics.record(self.spans, self.intent, total, error=exc_type is not None)
+        return False
+
+def span(stage: str):
+    """Context manager timing one pipeline stage"""
+    if not TRACING:
+        return _NOOP
+    return _Span(stage)
+
+def message_trace():
+    """Context manager around handling one message"""
+    if not TRACING:
+        return _NOOP
+    return MessageTrace()
+
+def set_intent(intent: str):
+    """Label the current message's spans with its intent"""
+    trace = _current.get()
+    if trace is not None:
+        trace.intent = intent
+
+def count(name: str, intent: str = None, n: int = 1):
+    """Bump a counter, labelled with `intent` or the current message's intent"""
+    if not TRACING:
+        return
+    if intent is None:
+        trace = _current.get()
+        intent = trace.intent if trace is not None else UNKNOWN_INTENT
+    metrics.count(name, intent, n)
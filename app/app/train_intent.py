@@ -1,63 +1,104 @@
+import argparse
 import os
+import sys
 import json
 import pickle
-import re
-import string
+import time
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.pipeline import make_pipeline
 
-# ==========================================
-# PREPROCESSING FUNCTION
-# ==========================================
-def preprocess_text(text):
-    text = text.lower() # Lowercasing
-
-    # Remove URLs
-    text = re.sub(r'http\S+|www.\S+', '', text)
-
-    # Remove emojis (basic pattern)
-    emoji_pattern = re.compile("["
-                           "\U0001F600-\U0001F64F"  # emoticons
-                           "\U0001F300-\U0001F5FF"  # symbols & pictographs
-                           "\U0001F680-\U0001F6FF"  # transport & map symbols
-                           "\U0001F1E0-\U0001F1FF"  # flags (iOS)
-                           "\U00002702-\U000027B0"
-                           "\U000024C2-\U0001F251"
-                           "]+", flags=re.UNICODE)
-    text = emoji_pattern.sub(r'', text)
-
-    # Remove special characters (punctuation and other non-alphanumeric except space)
-    text = text.translate(str.maketrans('', '', string.punctuation))
-    text = re.sub(r'[^a-zA-Z0-9\s]', '', text) # Remove any remaining non-alphanumeric chars not covered by string.punctuation
-
-    # Remove extra whitespaces
-    text = re.sub(r'\s+', ' ', text).strip()
-
-    return text
-    
+# Allow running as a script (python app/train_intent.py) as well as a module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Same normalization as serving (app.nlp_pipeline / app.chatbot)
+from app.preprocessing import normalize_batch
+from app import intent_store
+
 # ==========================================
 # PERSIAPAN DATA & TRAINING MODEL
 # ==========================================
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_PATH = os.path.join(os.path.dirname(SCRIPT_DIR), "data", "intent_id.json")
+MODELS_DIR = os.path.join(SCRIPT_DIR, "models")
 
-# Load dataset
-with open(DATA_PATH, encoding="utf-8") as f:
-    training_data = json.load(f)
+def load_examples(path):
+    """[{"text": ..., "label": ...}] from a JSON list or a JSONL file"""
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+    if content.lstrip().startswith("["):
+        return json.loads(content)
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
 
-# Preprocess training texts
-texts = [preprocess_text(data["text"]) for data in training_data]
-labels = [data["label"] for data in training_data]
+def save_training_data(examples):
+    with open(DATA_PATH, "w", encoding="utf-8") as f:
+        f.write(json.dumps(examples, indent=2, ensure_ascii=False) + "\n")
 
-model = make_pipeline(TfidfVectorizer(), MultinomialNB())
-model.fit(texts, labels)
+def train_full(training_data):
+    """Refit TF-IDF + NB over everything, as intent_model_simple.pkl and as a new published version"""
+    texts = normalize_batch(data["text"] for data in training_data)
+    labels = [data["label"] for data in training_data]
 
-# Simpan model (Opsional, untuk arsip)
-MODELS_DIR = os.path.join(SCRIPT_DIR, "models")
-os.makedirs(MODELS_DIR, exist_ok=True)
-with open(os.path.join(MODELS_DIR, "intent_model_simple.pkl"), "wb") as f:
-    pickle.dump(model, f)
-print("✅ Model berhasil dilatih dan siap digunakan.\n")
+    model = make_pipeline(TfidfVectorizer(), MultinomialNB())
+    model.fit(texts, labels)
+
+    # Simpan model (Opsional, untuk arsip)
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    with open(os.path.join(MODELS_DIR, "intent_model_simple.pkl"), "wb") as f:
+        pickle.dump(model, f)
+    version = intent_store.publish(model, examples=len(texts))
+    print(f"✅ Model berhasil dilatih dan siap digunakan (versi {version}).\n")
+
+def add_examples(training_data, new_examples):
+    """Add labelled utterances: partial_fit the current hashing model, or refit it for a new intent"""
+    start = time.perf_counter()
+    known = {(data["text"], data["label"]) for data in training_data}
+    new_examples = [{"text": e["text"], "label": e["label"]} for e in new_examples if (e["text"], e["label"]) not in known]
+    if not new_examples:
+        print("Tidak ada contoh baru.")
+        return
+    all_examples = training_data + new_examples
+
+    current = intent_store.load_current()
+    new_labels = {e["label"] for e in new_examples}
+    if current is not None and current["incremental"] and new_labels <= set(current["model"].classes_):
+        model = intent_store.partial_fit(
+            current["model"], normalize_batch(e["text"] for e in new_examples), [e["label"] for e in new_examples]
+        )
+        how = f"partial_fit {len(new_examples)} contoh"
+    else:
+        # First incremental model, or an intent the model has never seen
+        model = intent_store.fit_hashing(
+            normalize_batch(e["text"] for e in all_examples), [e["label"] for e in all_examples]
+        )
+        how = f"refit {len(all_examples)} contoh"
+
+    version = intent_store.publish(model, examples=len(all_examples))
+    # Keep the full corpus complete for the next full retrain
+    save_training_data(all_examples)
+    print(f"✅ Versi {version} dipublikasikan ({how}, {(time.perf_counter() - start) * 1000:.0f} ms).")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the intent model (full or incremental)")
+    parser.add_argument("--add", nargs="+", metavar="FILE",
+                        help="JSON/JSONL files of {text, label} to add incrementally (also appended to intent_id.json)")
+    parser.add_argument("--rollback", type=int, metavar="VERSION", help="point serving back at a published version")
+    args = parser.parse_args(argv)
+
+    if args.rollback is not None:
+        intent_store.set_current(args.rollback)
+        print(f"✅ Model intent kembali ke versi {args.rollback}.")
+        return
+
+    # Load dataset
+    with open(DATA_PATH, encoding="utf-8") as f:
+        training_data = json.load(f)
+
+    if args.add:
+        add_examples(training_data, [e for path in args.add for e in load_examples(path)])
+    else:
+        train_full(training_data)
 
+if __name__ == "__main__":
+    main()
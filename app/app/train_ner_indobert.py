@@ -1,5 +1,7 @@
-from datasets import load_dataset, Sequence, ClassLabel
+from datasets import load_dataset, load_from_disk, Sequence, ClassLabel
 from transformers import AutoTokenizer, AutoModelForTokenClassification, TrainingArguments, Trainer, DataCollatorForTokenClassification
+import hashlib
+import json
 import numpy as np
 import os
 import evaluate
@@ -7,13 +9,16 @@ import evaluate
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_PATH = os.path.join(os.path.dirname(SCRIPT_DIR), "data", "ner_id.json")
-dataset = load_dataset("json", data_files=DATA_PATH)
+CACHE_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), "data", ".ner_cache")
+BASE_MODEL = "indobenchmark/indobert-base-p1"
+MAX_LENGTH = 512
+TEST_SIZE = 0.2
+SPLIT_SEED = 42
+CACHE_VERSION = 1            # bump when the tokenization/alignment below changes
+EXAMPLES_PER_PROC = 1000     # smaller datasets are not worth the worker start-up
+NUM_PROC = int(os.environ.get("NER_MAP_PROCS", str(min(8, os.cpu_count() or 1))))
 
-# Split dataset: 80% train, 20% test
-dataset = dataset["train"].train_test_split(test_size=0.2, seed=42)
-print(f"Train size: {len(dataset['train'])}, Test size: {len(dataset['test'])}")
-
-tokenizer = AutoTokenizer.from_pretrained("indobenchmark/indobert-base-p1")
+tokenizer = AutoTokenizer.from_pretrained(BASE_MODEL)
 
 label_list = ["O", "B-BRAND", "I-BRAND", "B-MODEL", "I-MODEL", "B-RAM", "I-RAM", "B-STORAGE", "I-STORAGE", 
               "B-SCREEN_SIZE", "I-SCREEN_SIZE", "B-BUDGET", "I-BUDGET", "B-USAGE", "I-USAGE",
@@ -21,54 +26,83 @@ label_list = ["O", "B-BRAND", "I-BRAND", "B-MODEL", "I-MODEL", "B-RAM", "I-RAM",
 label2id = {l:i for i,l in enumerate(label_list)}
 id2label = {i:l for l,i in label2id.items()}
 
+def char_label_ids(text, entities):
+    """Label id of every character: B- on an entity's first char, I- on the rest"""
+    char_labels = np.zeros(len(text), dtype=np.int64)   # "O"
+    for entity in entities:
+        start, end = entity["start"], min(entity["end"], len(text))  # Bounds check
+        if start < len(text):
+            char_labels[start] = label2id[f"B-{entity['label']}"]
+        char_labels[start + 1:end] = label2id[f"I-{entity['label']}"]
+    return char_labels
+
 def tokenize_and_align_labels(examples):
-    tokenized_inputs = tokenizer(examples["text"], truncation=True, max_length=512)
+    """Label each word's first sub-token with the label of its first character, -100 elsewhere"""
+    tokenized_inputs = tokenizer(examples["text"], truncation=True, max_length=MAX_LENGTH, return_offsets_mapping=True)
+    offset_mapping = tokenized_inputs.pop("offset_mapping")
     labels = []
-    
-    for i in range(len(examples["text"])):
-        text = examples["text"][i]
-        entities = examples["entities"][i]
-        
-        # Create character-level labels
-        char_labels = ["O"] * len(text)
-        for entity in entities:
-            label = entity["label"]
-            start = entity["start"]
-            end = min(entity["end"], len(text))  # Bounds check
-            # Mark first character with B- prefix
-            if start < len(text):
-                char_labels[start] = f"B-{label}"
-            # Mark rest with I- prefix
-            for j in range(start + 1, end):
-                char_labels[j] = f"I-{label}"
-        
-        # Align with tokens
-        word_ids = tokenized_inputs.word_ids(batch_index=i)
-        label_ids = []
-        previous_word_idx = None
-        
-        for token_idx, word_idx in enumerate(word_ids):
-            if word_idx is None:
-                label_ids.append(-100)
-            elif word_idx != previous_word_idx:
-                # Get character offset for this token
-                char_span = tokenized_inputs.token_to_chars(i, token_idx)
-                if char_span is not None:
-                    label_ids.append(label2id[char_labels[char_span.start]])
-                else:
-                    label_ids.append(label2id["O"])
-            else:
-                label_ids.append(-100)
-            previous_word_idx = word_idx
-        
-        labels.append(label_ids)
-    
+
+    for i, (text, entities) in enumerate(zip(examples["text"], examples["entities"])):
+        char_labels = char_label_ids(text, entities)
+        starts = np.asarray(offset_mapping[i], dtype=np.int64).reshape(-1, 2)[:, 0]
+        word_ids = np.array([-1 if w is None else w for w in tokenized_inputs.word_ids(batch_index=i)], dtype=np.int64)
+
+        # First sub-token of each word: a real word whose id differs from the previous token's
+        first = word_ids != -1
+        first[1:] &= word_ids[1:] != word_ids[:-1]
+
+        label_ids = np.full(len(word_ids), -100, dtype=np.int64)
+        in_text = first & (starts < len(text))
+        label_ids[in_text] = char_labels[starts[in_text]]
+        label_ids[first & ~in_text] = label2id["O"]
+        labels.append(label_ids.tolist())
+
     tokenized_inputs["labels"] = labels
+    # Lets group_by_length sort by length without re-reading input_ids
+    tokenized_inputs["length"] = [len(ids) for ids in tokenized_inputs["input_ids"]]
     return tokenized_inputs
 
-tokenized_datasets = dataset.map(tokenize_and_align_labels, batched=True)
+def cache_key():
+    """Hash of everything the tokenized dataset depends on"""
+    digest = hashlib.sha256()
+    with open(DATA_PATH, "rb") as f:
+        digest.update(f.read())
+    digest.update(tokenizer.backend_tokenizer.to_str().encode("utf-8"))
+    digest.update(json.dumps([BASE_MODEL, label_list, MAX_LENGTH, TEST_SIZE, SPLIT_SEED, CACHE_VERSION]).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+def load_tokenized_datasets():
+    """Train/test split, tokenized and aligned, reused from CACHE_DIR while data and tokenizer are unchanged"""
+    cache_path = os.path.join(CACHE_DIR, cache_key())
+    if os.path.isdir(cache_path):
+        print(f"Using cached tokenized dataset {cache_path}")
+        return load_from_disk(cache_path)
+
+    dataset = load_dataset("json", data_files=DATA_PATH)
+    # Split dataset: 80% train, 20% test
+    dataset = dataset["train"].train_test_split(test_size=TEST_SIZE, seed=SPLIT_SEED)
+
+    num_proc = min(NUM_PROC, len(dataset["train"]) // EXAMPLES_PER_PROC)
+    if num_proc > 1:
+        # Rust-side parallelism would be disabled (with a warning) in forked workers anyway
+        os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    tokenized = dataset.map(
+        tokenize_and_align_labels,
+        batched=True,
+        num_proc=num_proc if num_proc > 1 else None,
+        remove_columns=dataset["train"].column_names,
+    )
+    # Write next to the final path and rename, so an interrupted run leaves no half-written cache
+    tmp_path = f"{cache_path}.tmp-{os.getpid()}"
+    tokenized.save_to_disk(tmp_path)
+    os.replace(tmp_path, cache_path)
+    return tokenized
+
+tokenized_datasets = load_tokenized_datasets()
+print(f"Train size: {len(tokenized_datasets['train'])}, Test size: {len(tokenized_datasets['test'])}")
+
 model = AutoModelForTokenClassification.from_pretrained(
-    "indobenchmark/indobert-base-p1",
+    BASE_MODEL,
     num_labels=len(label_list),
     id2label=id2label,
     label2id=label2id
@@ -80,7 +114,9 @@ args = TrainingArguments(
     per_device_train_batch_size=4,
     eval_strategy="epoch",
     logging_steps=10,
-    save_strategy="no"  # Disable checkpoint saving
+    save_strategy="no",  # Disable checkpoint saving
+    group_by_length=True,  # batch similar lengths so dynamic padding pads little
+    length_column_name="length",
 )
 
 metric = evaluate.load("seqeval")
@@ -97,6 +133,7 @@ def compute_metrics(p):
       "f1": results["overall_f1"]
     }
 
+# Pads each batch only to its longest sequence
 data_collator = DataCollatorForTokenClassification(tokenizer)
 
 trainer = Trainer(
@@ -1,7 +1,54 @@
-from app.chatbot import chatbot_reply
+import argparse
+import logging
+import os
+import sys
+import time
+
+_start = time.perf_counter()
+
+parser = argparse.ArgumentParser(description="Laptop Recommender Chatbot")
+parser.add_argument("--serve", action="store_true", help="jalankan HTTP API (POST /chat) alih-alih chat interaktif")
+parser.add_argument("--host", default=None)
+parser.add_argument("--port", type=int, default=None)
+parser.add_argument("--workers", type=int, default=0,
+                    help="dengan --serve: fork N proses worker yang berbagi model (0 = satu proses)")
+parser.add_argument("--bulk", metavar="INPUT",
+                    help="jawab semua pesan di file JSONL ({\"text\": ...} per baris, - = stdin) lalu keluar")
+parser.add_argument("--output", default="-", help="dengan --bulk: file JSONL hasil (default stdout)")
+parser.add_argument("--processes", type=int, default=None,
+                    help="dengan --bulk: proses untuk filter katalog (default jumlah CPU, 1 = tanpa pool)")
+parser.add_argument("--no-ner", action="store_true", help="dengan --bulk: entitas dari gazetteer saja, tanpa IndoBERT")
+args = parser.parse_args()
+
+# LOG_LEVEL=DEBUG shows the intent/entity/param trace of every message
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "WARNING").upper(),
+                    format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+if args.serve:
+    from app import server
+    if args.workers > 0:
+        from app.prefork import serve_prefork
+        serve_prefork(args.workers, host=args.host or server.HOST, port=args.port or server.PORT)
+    else:
+        server.run(host=args.host or server.HOST, port=args.port or server.PORT)
+    sys.exit()
+
+if args.bulk:
+    import json
+    from app import bulk
+    report = bulk.run(args.bulk, args.output, processes=args.processes, use_ner=not args.no_ner)
+    print(json.dumps(report, indent=2), file=sys.stderr)
+    sys.exit()
+
+from app.chatbot import chatbot_reply, warmup
+from app import nlp_pipeline
+
+# Load catalog and models in the background; greetings can be answered meanwhile
+warmup(background=True)
 
 print("🤖 Laptop Recommender Chatbot (Bahasa Indonesia)")
 print("Tulis 'keluar' untuk berhenti.")
+print(f"(siap dalam {(time.perf_counter() - _start) * 1000:.0f} ms)")
 print("--------------------------------------")
 
 while True:
@@ -13,3 +60,6 @@ while True:
     print("Bot:", reply)
     if(reply == "Terima kasih! Semoga harimu menyenangkan. 👋"):
         break
+
+if nlp_pipeline.load_times:
+    print("Waktu muat: " + ", ".join(f"{name} {secs * 1000:.0f} ms" for name, secs in nlp_pipeline.load_times.items()))
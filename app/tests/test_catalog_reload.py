@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from app.recommender import Catalog, changed_rows, read_csv, recommend
+
+QUERIES = (
+    {"budget": 1_000_000, "rank_by": "price"},
+    {"usage": "gaming", "budget": 20_000_000, "rank_by": "score"},
+    {"brand": "asus", "rank_by": "price", "k": 10},
+    {"ram": 16, "rank_by": "price"},
+)
+
+def test_price_patch_matches_rebuild():
+    base = read_csv()
+    df = base.copy()
+    rows = np.array([5, 17, 400, len(df) - 1])
+    df.loc[rows, "Final Price"] = [50.0, 3999.0, np.nan, 1234.5]
+
+    changes = changed_rows(base, df)
+    assert set(changes) == {"Final Price"}
+    patched = Catalog(base).with_changes(df, changes)
+    rebuilt = Catalog(df)
+
+    assert patched.index.df is df
+    np.testing.assert_array_equal(patched.index.price_order, rebuilt.index.price_order)
+    for query in QUERIES:
+        pd.testing.assert_frame_equal(recommend(patched.index, **query), recommend(rebuilt.index, **query))
+
+    cheapest = recommend(patched.index, budget=1_000_000, rank_by="price")
+    assert cheapest.index[0] == 5 and cheapest["Final Price"].iloc[0] == 50.0
+
+def test_status_patch_takes_rows_from_new_frame():
+    base = read_csv()
+    df = base.copy()
+    df.loc[3, "Status"] = "Refurbished" if df.loc[3, "Status"] != "Refurbished" else "New"
+
+    patched = Catalog(base).with_changes(df, changed_rows(base, df))
+    assert patched.index.df is df
+    pd.testing.assert_frame_equal(patched.index.take([3]), Catalog(df).index.take([3]))
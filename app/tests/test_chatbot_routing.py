@@ -0,0 +1,16 @@
+import pytest
+
+from app.chatbot import Analysis, get_catalog, similar_reference
+
+# "kayak"/"seperti" without a named laptop keeps the predicted intent
+@pytest.mark.parametrize("text, similar", [
+    ("laptop kayak gimana yang bagus buat kuliah", False),
+    ("rekomendasi laptop kayak apa buat gaming", False),
+    ("laptop seperti apa yang bagus buat kuliah?", False),
+    ("alternatif macbook air di bawah 15 juta", True),
+    ("laptop yang mirip asus rog", True),
+])
+def test_similar_routing(text, similar):
+    catalog = get_catalog()
+    analysis = Analysis(None, catalog.gazetteer.match(text).entities, {})
+    assert (similar_reference(text, analysis, catalog) is not None) == similar
@@ -0,0 +1,18 @@
+import pytest
+
+from app.chatbot import extract_params, get_catalog
+
+@pytest.mark.parametrize("text, budget", [
+    ("budget 7.5 juta buat gaming", 7_500_000),
+    ("budget 7,5 jt", 7_500_000),
+    ("laptop harga 12 juta", 12_000_000),
+    ("budget rp 7.500.000", 7_500_000),
+])
+def test_gazetteer_budget(text, budget):
+    match = get_catalog().gazetteer.match(text)
+    assert match.confident
+    assert extract_params(text, match.entities)["budget"] == budget
+
+def test_ner_budget_tokens():
+    entities = {"B-BUDGET": ["7", "##.", "##5"], "I-BUDGET": ["juta"]}
+    assert extract_params("budget 7.5 juta", entities)["budget"] == 7_500_000
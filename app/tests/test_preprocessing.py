@@ -0,0 +1,50 @@
+import json
+import os
+import re
+import string
+
+import pytest
+
+from app.preprocessing import normalize_batch, preprocess_text
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+def reference(text):
+    """The original regex pipeline preprocess_text must stay byte-identical to"""
+    text = text.lower()
+    text = re.sub(r'http\S+|www.\S+', '', text)
+    emoji_pattern = re.compile("["
+                           "\U0001F600-\U0001F64F"
+                           "\U0001F300-\U0001F5FF"
+                           "\U0001F680-\U0001F6FF"
+                           "\U0001F1E0-\U0001F1FF"
+                           "\U00002702-\U000027B0"
+                           "\U000024C2-\U0001F251"
+                           "]+", flags=re.UNICODE)
+    text = emoji_pattern.sub(r'', text)
+    text = text.translate(str.maketrans('', '', string.punctuation))
+    text = re.sub(r'[^a-zA-Z0-9\s]', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+def corpus():
+    texts = []
+    for name in ("intent_id.json", "ner_id.json"):
+        with open(os.path.join(DATA_DIR, name), encoding="utf-8") as f:
+            texts += [example["text"] for example in json.load(f)]
+    texts += [
+        "Halo!! 😀 cek https://toko.id/asus?x=1 ya", "www.\nfoo", "Harga　ASUS ROG  \t14.5\"",
+        "Laptop™ café — 16GB… ✅", "ＡＳＵＳ ＲＯＧ", "İstanbul", "\x1c\x1d tab\there ",
+    ]
+    # Every code point below U+20000, in blocks of 512
+    texts += ["".join(chr(c) for c in range(start, start + 512)) for start in range(0, 0x20000, 512)]
+    return texts
+
+TEXTS = corpus()
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_matches_reference(text):
+    assert preprocess_text(text) == reference(text)
+
+def test_normalize_batch():
+    assert normalize_batch(TEXTS) == [reference(text) for text in TEXTS]
@@ -0,0 +1,19 @@
+import numpy as np
+
+from app.recommender import IDR_PER_USD, RESULT_COLUMNS, Catalog, read_csv
+from app.render import format_idr
+
+def pandas_table(df):
+    """The pandas rendering CatalogDisplay.table replaces"""
+    df = df[RESULT_COLUMNS].copy()
+    df["Final Price (IDR)"] = df["Final Price"].apply(lambda x: format_idr(x, IDR_PER_USD))
+    return df.drop(columns=["Final Price"]).to_string(index=False)
+
+def test_table_matches_pandas():
+    df = read_csv()
+    display = Catalog(df).display
+    rng = np.random.default_rng(0)
+    selections = [[0], list(range(5)), list(range(len(df) - 5, len(df)))]
+    selections += [rng.choice(len(df), size=5, replace=False).tolist() for _ in range(200)]
+    for rows in selections:
+        assert display.render(rows) == pandas_table(df.iloc[rows])